@@ -0,0 +1,32 @@
+"""Compare Dtab.lookup with CompiledDtab.lookup on generated dtabs.
+
+   PYTHONPATH=. python benchmarks/compiled_lookup.py [repeat]
+
+   benchmarks/suite.py also measures both, among other things.
+"""
+from dtab.dtab import Dtab
+from dtab.path import Path
+from generate import Shape, generate, generate_paths
+import sys
+import timeit
+
+
+def main(repeat=3):
+  print("{:>8} {:>14} {:>14} {:>8}".format("dentries", "lookup us/op", "compiled us/op", "speedup"))
+  for size in (100, 1000, 10000):
+    shape = Shape(dentries=size)
+    dtab = Dtab.read(generate(shape))
+    compiled = dtab.compile()
+    paths = [Path.read(p) for p in generate_paths(shape, 1000)]
+    for path in paths:
+      assert compiled.lookup(path) == dtab.lookup(path)
+
+    def run(lookup):
+      return min(timeit.repeat(lambda: [lookup(p) for p in paths], number=1, repeat=repeat)) * 1e6 / len(paths)
+    plain = run(dtab.lookup)
+    fast = run(compiled.lookup)
+    print("{:>8} {:>14.2f} {:>14.2f} {:>7.1f}x".format(size, plain, fast, plain / fast))
+
+
+if __name__ == '__main__':
+  main(*[int(arg) for arg in sys.argv[1:]])
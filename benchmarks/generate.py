@@ -0,0 +1,88 @@
+"""Synthetic dtabs and lookup paths for the benchmarks.
+
+   python benchmarks/generate.py [dentries] [wildcards] [depth] [fanout]
+
+   prints a generated dtab.
+"""
+import random
+import sys
+
+ENVS = ["prod", "staging", "dev", "canary"]
+ZONES = ["east", "west", "central"]
+
+
+class Shape(object):
+  """The knobs of a generated dtab: its number of dentries, the chance
+     that a prefix element is a `*`, how deep Alt/Union trees nest and
+     how many branches each of them has"""
+
+  def __init__(self, dentries=1000, wildcards=0.1, depth=1, fanout=2, seed=0):
+    self.dentries = dentries
+    self.wildcards = wildcards
+    self.depth = depth
+    self.fanout = fanout
+    self.seed = seed
+
+  def __str__(self):
+    return "dentries={} wildcards={} depth={} fanout={}".format(
+        self.dentries, self.wildcards, self.depth, self.fanout)
+
+
+def generate_tree(rng, depth, fanout, service):
+  if depth == 0:
+    if rng.random() < 0.5:
+      return "/srv/{}/{}".format(rng.choice(ZONES), service)
+    return "/$/inet/{}.{}/{}".format(service, rng.choice(ZONES), rng.randrange(8000, 9000))
+  branches = [generate_tree(rng, depth - 1, fanout, service) for _ in range(fanout)]
+  if rng.random() < 0.5:
+    return "(" + " | ".join(branches) + ")"
+  return "(" + " & ".join("{} * {}".format(rng.randrange(1, 10), b) for b in branches) + ")"
+
+
+def generate_prefixes(shape):
+  """List of the (env, service, extra) elements of each dentry prefix"""
+  rng = random.Random(shape.seed)
+  prefixes = []
+  for i in range(shape.dentries):
+    prefixes.append((rng.choice(ENVS), "svc{}".format(i % max(1, shape.dentries // 2)),
+                     "v{}".format(rng.randrange(3)) if rng.random() < 0.3 else None))
+  return prefixes
+
+
+def generate(shape):
+  """Dtab source text of `shape`.
+
+     Prefixes look like /s/<env>/<service>[/<version>], with the env and
+     version replaced by `*` at the wildcard rate.  Leaves are namer
+     paths or /srv/<zone>/<service> paths, which bind through a
+     /srv/<zone> dentry per zone.
+  """
+  rng = random.Random(shape.seed)
+  lines = []
+  for zone in ZONES:
+    lines.append("/srv/{} => /$/inet/fallback.{}/80".format(zone, zone))
+  for env, service, extra in generate_prefixes(shape):
+    elems = ["s", env, service] + ([extra] if extra else [])
+    # services are never wildcarded, as in real dtabs
+    elems = [e if i in (0, 2) or rng.random() >= shape.wildcards else "*" for i, e in enumerate(elems)]
+    lines.append("/{} => {}".format("/".join(elems), generate_tree(rng, shape.depth, shape.fanout, service)))
+  return ";\n".join(lines)
+
+
+def generate_paths(shape, count, seed=1):
+  """Source text of `count` paths, mostly under generated prefixes"""
+  rng = random.Random(seed)
+  prefixes = generate_prefixes(shape)
+  paths = []
+  for _ in range(count):
+    env, service, extra = rng.choice(prefixes)
+    if rng.random() < 0.1:
+      service = "unknown{}".format(rng.randrange(100))
+    paths.append("/s/{}/{}/{}/rpc".format(env, service, extra or "v0"))
+  return paths
+
+
+if __name__ == '__main__':
+  args = sys.argv[1:]
+  types = [int, float, int, int]
+  print(generate(Shape(*[t(a) for t, a in zip(types, args)])))
@@ -0,0 +1,218 @@
+"""Benchmarks of parsing, lookup, binding and concatenation on generated
+   dtabs, see generate.py.
+
+   PYTHONPATH=. python benchmarks/suite.py [--quick] [--output FILE]
+       [--baseline FILE] [--threshold RATIO] [--save-baseline]
+
+   Results are written as JSON, one entry per metric.  With --baseline,
+   each metric is compared to the stored one and the run fails if any is
+   worse by more than the threshold ratio (0.25 by default).
+   --save-baseline stores the results as the baseline instead.
+"""
+from dtab.dtab import Dtab, Dentry
+from dtab.parser import NameTreeParsers
+from dtab.path import Path
+from generate import Shape, generate, generate_paths
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import timeit
+import tracemalloc
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+SHAPES = [
+    Shape(dentries=100),
+    Shape(dentries=1000),
+    Shape(dentries=1000, wildcards=0.4, depth=2, fanout=3),
+    Shape(dentries=10000),
+]
+QUICK_SHAPES = SHAPES[:2]
+
+
+def best_of(function, repeat):
+  """Fastest of `repeat` timed calls of `function`, in seconds"""
+  times = []
+  for _ in range(repeat):
+    start = time.perf_counter()
+    function()
+    times.append(time.perf_counter() - start)
+  return min(times)
+
+
+def median_of(function, repeat):
+  """Median time of a call of `function` over `repeat` samples, in
+     seconds.  Each sample times as many calls as timeit.Timer.autorange
+     needs for 0.2s, so calls of a few microseconds are not lost in the
+     resolution and jitter of the timer"""
+  timer = timeit.Timer(function)
+  number, _ = timer.autorange()
+  return statistics.median(timer.repeat(repeat, number)) / number
+
+
+def percentiles(function, args, passes=5, points=(50, 90, 99)):
+  """Latency percentiles of `function` called on each of `args`, in us.
+     The latency of each arg is the fastest of `passes` calls, with the
+     garbage collector off, so that a high percentile is the slow args
+     rather than the occasional interrupted call"""
+  latencies = [float('inf')] * len(args)
+  timer = time.perf_counter
+  enabled = gc.isenabled()
+  gc.disable()
+  try:
+    for _ in range(passes):
+      for i, arg in enumerate(args):
+        start = timer()
+        function(arg)
+        latencies[i] = min(latencies[i], timer() - start)
+  finally:
+    if enabled:
+      gc.enable()
+  latencies.sort()
+  return dict((p, latencies[min(len(latencies) - 1, len(latencies) * p // 100)] * 1e6)
+              for p in points)
+
+
+def bench_parse(shape, source, repeat):
+  results = {}
+  readers = [
+      ('default', lambda: NameTreeParsers.parseDtab(source)),
+      ('fast', lambda: NameTreeParsers.parseDtab(source, fast=True)),
+      ('lazy', lambda: NameTreeParsers.parseLazyDtab(source)),
+  ]
+  for name, read in readers:
+    results['parse.{}'.format(name)] = (shape.dentries / best_of(read, repeat), 'dentries/s', True)
+  return results
+
+
+def bench_lookup(shape, dtab, paths):
+  results = {}
+  compiled = dtab.compile()
+  for name, lookup in [('lookup', dtab.lookup), ('compiled', compiled.lookup), ('bind', dtab.bind)]:
+    lookup(paths[0])  # build indexes outside of the timings
+    for p, latency in sorted(percentiles(lookup, paths).items()):
+      results['{}.p{}'.format(name, p)] = (latency, 'us', False)
+  elapsed = median_of(lambda: [dtab.lookup(path) for path in paths], 5)
+  results['lookup_loop'] = (len(paths) / elapsed, 'paths/s', True)
+  elapsed = median_of(lambda: dtab.lookup_many(paths), 5)
+  results['lookup_many'] = (len(paths) / elapsed, 'paths/s', True)
+  return results
+
+
+def bench_concat(shape, dtab):
+  other = Dtab.read(generate(Shape(dentries=10, seed=shape.seed + 1)))
+  dentries = [Dentry.read("/s/extra/svc{} => /srv/east/svc{}".format(i, i)) for i in range(100)]
+  path = Path.read("/s/prod/svc1/v0/rpc")
+
+  def append():
+    appended = dtab
+    for dentry in dentries:
+      appended = appended + dentry
+    return appended
+
+  return {
+      'concat.small': (median_of(lambda: dtab + other, 5) * 1e6, 'us', False),
+      'concat.append100': (median_of(append, 5) * 1e6, 'us', False),
+      'concat.first_lookup': (median_of(lambda: (dtab + other).lookup(path), 5) * 1e6, 'us', False),
+  }
+
+
+def bench_memory(shape, source):
+  gc.collect()
+  tracemalloc.start()
+  try:
+    before = tracemalloc.get_traced_memory()[0]
+    dtab = NameTreeParsers.parseDtab(source)
+    dtab.lookup(Path.read("/s/prod/svc1"))  # with its index
+    used = tracemalloc.get_traced_memory()[0] - before
+  finally:
+    tracemalloc.stop()
+  del dtab
+  return {'memory.per_dentry': (used / float(shape.dentries), 'bytes', False)}
+
+
+def run(shapes, repeat):
+  """Dict of metric name to (value, unit, higher is better)"""
+  results = {}
+  for shape in shapes:
+    source = generate(shape)
+    dtab = Dtab.read(source)
+    paths = [Path.read(p) for p in generate_paths(shape, 2000)]
+    measured = {}
+    measured.update(bench_parse(shape, source, repeat))
+    measured.update(bench_lookup(shape, dtab, paths))
+    measured.update(bench_concat(shape, dtab))
+    measured.update(bench_memory(shape, source))
+    for name, result in measured.items():
+      results['{} {}'.format(name, shape)] = result
+    sys.stderr.write("measured {}\n".format(shape))
+  return results
+
+
+def to_json(results):
+  return {
+      'python': platform.python_version(),
+      'implementation': platform.python_implementation(),
+      'results': dict((name, {'value': value, 'unit': unit, 'higher_is_better': higher})
+                      for name, (value, unit, higher) in results.items()),
+  }
+
+
+def compare(current, baseline, threshold):
+  """List of (name, current, baseline, change) of the metrics of
+     `current` worse than in `baseline` by more than `threshold`, printing
+     every comparison"""
+  regressions = []
+  for name in sorted(current['results']):
+    if name not in baseline['results']:
+      continue
+    result, base = current['results'][name], baseline['results'][name]['value']
+    if not base:
+      continue
+    change = result['value'] / base - 1
+    worse = -change if result['higher_is_better'] else change
+    flag = ''
+    if worse > threshold:
+      regressions.append((name, result['value'], base, change))
+      flag = ' REGRESSION'
+    print("{:<70} {:>14.2f} {:>14.2f} {:>+8.1%}{}".format(name, result['value'], base, change, flag))
+  return regressions
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--quick', action='store_true', help="only the smaller dtabs")
+  parser.add_argument('--repeat', type=int, default=3)
+  parser.add_argument('--output', help="write results to this JSON file")
+  parser.add_argument('--baseline', nargs='?', const=BASELINE, help="compare with this JSON file")
+  parser.add_argument('--threshold', type=float, default=0.25)
+  parser.add_argument('--save-baseline', action='store_true')
+  args = parser.parse_args(argv)
+
+  current = to_json(run(QUICK_SHAPES if args.quick else SHAPES, args.repeat))
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump(current, f, indent=2, sort_keys=True)
+  if args.save_baseline:
+    with open(BASELINE, 'w') as f:
+      json.dump(current, f, indent=2, sort_keys=True)
+  if args.baseline:
+    with open(args.baseline) as f:
+      baseline = json.load(f)
+    print("{:<70} {:>14} {:>14} {:>8}".format("metric", "current", "baseline", "change"))
+    regressions = compare(current, baseline, args.threshold)
+    if regressions:
+      print("{} metrics regressed by more than {:.0%}".format(len(regressions), args.threshold))
+      return 1
+  elif not args.output:
+    json.dump(current, sys.stdout, indent=2, sort_keys=True)
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
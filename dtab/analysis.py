@@ -0,0 +1,119 @@
+from dtab.index import PrefixTrieNode
+from dtab.tree import NameTree
+
+
+class DeadDentry(object):
+  """A dentry of a dtab that no binding can select: its tree is always
+     Neg, or the later dentry at index `shadowed_by` matches every path
+     it matches and never goes Neg"""
+
+  def __init__(self, index, dentry, shadowed_by=None):
+    self.index = index
+    self.dentry = dentry
+    self.shadowed_by = shadowed_by
+
+  @property
+  def reason(self):
+    return "neg" if self.shadowed_by is None else "shadowed"
+
+  def __str__(self):
+    if self.shadowed_by is None:
+      return "DeadDentry({}: {} is always Neg)".format(self.index, self.dentry.show)
+    return "DeadDentry({}: {} is shadowed by {})".format(
+        self.index, self.dentry.show, self.shadowed_by)
+
+
+def terminal(path):
+  """Whether the namer path `path`, with any suffix appended, is never
+     bound to Neg by the built-in namers of dtab.namer.NamerRegistry:
+     `/$/fail/...`, `/$/nil/...` and `/$/inet/<host>/<port>/...`.  Other
+     namers may return Neg for paths they do not know."""
+  elems = path.elems
+  if elems[:1] != ('$',) or len(elems) < 2:
+    return False
+  if elems[1] in ('fail', 'nil'):
+    return True
+  return elems[1] == 'inet' and len(elems) >= 4 and elems[3].isdigit()
+
+
+def never_neg(tree):
+  """Whether `tree`, with any suffix appended to its leaves, binds to
+     something other than Neg whatever the dtab: Fail, Empty and the
+     terminal namer path leaves are never Neg, any other path leaf may
+     be, and an Alt or Union is Neg only if all of its (positively
+     weighted) branches are"""
+  if tree is NameTree.Fail or tree is NameTree.Empty:
+    return True
+  if isinstance(tree, NameTree.Leaf):
+    return terminal(tree.value)
+  if isinstance(tree, NameTree.Alt):
+    return any(never_neg(t) for t in tree)
+  if isinstance(tree, NameTree.Union):
+    return any(w.weight > 0 and never_neg(w.tree) for w in tree)
+  if isinstance(tree, NameTree.Weighted):
+    return tree.weight > 0 and never_neg(tree.tree)
+  return False
+
+
+def covering(root, prefix, any_elem):
+  """Index stored on the first node of the trie at `root` whose prefix
+     matches every path `prefix` matches, or None"""
+  frontier = [root]
+  for elem in prefix.elems:
+    step = []
+    for node in frontier:
+      if node.entries:
+        return node.entries[0]
+      if elem is not any_elem:
+        child = node.children.get(elem.buf)
+        if child is not None:
+          step.append(child)
+      if node.wildcard is not None:
+        step.append(node.wildcard)
+    if not step:
+      return None
+    frontier = step
+  for node in frontier:
+    if node.entries:
+      return node.entries[0]
+  return None
+
+
+def dead_dentries(dtab):
+  """List[DeadDentry] of `dtab`, by index.
+
+     Lookups try later dentries first, and a binding selects the first
+     branch of an Alt that is not Neg, so a dentry is dead when its tree
+     simplifies to Neg, or when a later dentry whose prefix covers its
+     prefix (taking `*` into account) has a tree that can never be Neg,
+     see never_neg.  Dentries are visited last to first while the
+     prefixes of the never Neg ones are added to a trie, so each is
+     checked against all of the later ones in a single walk.
+  """
+  # avoiding circular dependencies
+  from dtab.dtab import AnyElem
+  root = PrefixTrieNode()
+  dead = []
+  dentries = dtab.dentries
+  for index in reversed(range(len(dentries))):
+    dentry = dentries[index]
+    shadowed_by = covering(root, dentry.prefix, AnyElem)
+    if shadowed_by is not None:
+      dead.append(DeadDentry(index, dentry, shadowed_by))
+    elif dentry.nametree.simplified is NameTree.Neg:
+      dead.append(DeadDentry(index, dentry))
+    elif never_neg(dentry.nametree):
+      node = root
+      for elem in dentry.prefix.elems:
+        if elem is AnyElem:
+          if node.wildcard is None:
+            node.wildcard = PrefixTrieNode()
+          node = node.wildcard
+        else:
+          child = node.children.get(elem.buf)
+          if child is None:
+            child = node.children[elem.buf] = PrefixTrieNode()
+          node = child
+      node.entries.append(index)
+  dead.reverse()
+  return dead
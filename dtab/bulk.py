@@ -0,0 +1,103 @@
+from concurrent.futures import ProcessPoolExecutor
+from dtab.codec import BinaryDtab
+from dtab.dtab import Dtab
+from dtab.error import IllegalArgumentException
+from dtab.parser import NameTreeParsers
+import io
+
+
+class ReadResult(object):
+  """The outcome of reading one source with read_all or read_files:
+     its `dtab`, or the `error` message that reading it raised.
+
+     A dtab read in a worker process arrives as its Dtab.to_bytes
+     encoding, `data`, and is only decoded when `dtab` is first used;
+     `binary` reads it in place as a dtab.codec.BinaryDtab."""
+  __slots__ = ('key', 'error', '_dtab', '_data')
+
+  def __init__(self, key, dtab=None, error=None, data=None):
+    self.key = key
+    self.error = error
+    self._dtab = dtab
+    self._data = data
+
+  @property
+  def ok(self):
+    return self.error is None
+
+  @property
+  def dtab(self):
+    if self._dtab is None and self._data is not None:
+      self._dtab = Dtab.from_bytes(self._data)
+    return self._dtab
+
+  @property
+  def data(self):
+    if self._data is None and self._dtab is not None:
+      self._data = self._dtab.to_bytes()
+    return self._data
+
+  @property
+  def binary(self):
+    data = self.data
+    return None if data is None else BinaryDtab(data)
+
+  def __str__(self):
+    if self.ok:
+      return "ReadResult({}, {})".format(self.key, self.dtab)
+    return "ReadResult({}, error={})".format(self.key, self.error)
+
+
+def _read(task, encode=True):
+  key, text, fast = task
+  try:
+    dtab = NameTreeParsers.parseDtab(text, fast)
+  except IllegalArgumentException as e:
+    return key, None, str(e)
+  return key, dtab.to_bytes() if encode else dtab, None
+
+
+def _read_file(task, encode=True):
+  filename, fast = task
+  try:
+    with io.open(filename, encoding='utf-8') as f:
+      text = f.read()
+  except (IOError, OSError, UnicodeDecodeError) as e:
+    return filename, None, "{}: {}".format(type(e).__name__, e)
+  return _read((filename, text, fast), encode)
+
+
+def _run(function, tasks, workers, chunksize):
+  if workers is not None and workers <= 1:
+    return [ReadResult(key, dtab, error) for key, dtab, error in
+            (function(task, encode=False) for task in tasks)]
+  with ProcessPoolExecutor(workers) as executor:
+    return [ReadResult(key, error=error, data=data) for key, data, error in
+            executor.map(function, tasks, chunksize=chunksize)]
+
+
+def read_all(sources, workers=None, fast=False, chunksize=8):
+  """Parse and validate many dtabs in a pool of `workers` processes, by
+     default one per CPU, or in this process if `workers` is 1.
+
+     `sources` is a mapping of keys to dtab strings, or an iterable of
+     dtab strings keyed by their position.  Returns List[ReadResult] in
+     input order; a source that fails to parse has the message of its
+     IllegalArgumentException as `error`.
+
+     Workers send each Dtab back in the compact encoding of
+     Dtab.to_bytes rather than as a pickled object graph, decoded only
+     when the `dtab` of its ReadResult is used, and are handed
+     `chunksize` sources at a time.
+  """
+  items = sources.items() if hasattr(sources, 'items') else enumerate(sources)
+  tasks = [(key, text, fast) for key, text in items]
+  return _run(_read, tasks, workers, chunksize)
+
+
+def read_files(filenames, workers=None, fast=False, chunksize=8):
+  """read_all of UTF-8 dtab files, each read by the worker that parses
+     it, keyed by filename.  A file that can not be read has the I/O
+     error as `error`"""
+  tasks = [(filename, fast) for filename in filenames]
+  return _run(_read_file, tasks, workers, chunksize)
@@ -0,0 +1,75 @@
+from collections import OrderedDict
+from threading import Lock
+
+MISSING = object()
+
+
+class LRUCache(object):
+  """A mapping bounded to `maxsize` entries which evicts the least
+     recently used entry first, and counts hits, misses and evictions.
+  """
+
+  def __init__(self, maxsize=1024):
+    if maxsize < 1:
+      raise ValueError("maxsize must be positive, got {}".format(maxsize))
+    self._maxsize = maxsize
+    self._entries = OrderedDict()
+    self._lock = Lock()
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+
+  @property
+  def maxsize(self):
+    return self._maxsize
+
+  @property
+  def stats(self):
+    return {
+        'hits': self.hits,
+        'misses': self.misses,
+        'evictions': self.evictions,
+        'size': len(self),
+        'maxsize': self.maxsize,
+    }
+
+  def get(self, key, default=None):
+    with self._lock:
+      try:
+        value = self._entries.pop(key)
+      except KeyError:
+        self.misses += 1
+        return default
+      self._entries[key] = value
+      self.hits += 1
+      return value
+
+  def put(self, key, value):
+    with self._lock:
+      self._entries.pop(key, None)
+      self._entries[key] = value
+      while len(self._entries) > self._maxsize:
+        self._entries.popitem(last=False)
+        self.evictions += 1
+
+  def get_or_load(self, key, loader):
+    """The value cached for `key`, calling `loader()` to fill a miss"""
+    value = self.get(key, MISSING)
+    if value is MISSING:
+      value = loader()
+      self.put(key, value)
+    return value
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+
+  def __contains__(self, key):
+    return key in self._entries
+
+  def __len__(self):
+    return len(self._entries)
+
+  def __str__(self):
+    return "LRUCache(hits={hits},misses={misses},evictions={evictions},size={size})".format(
+        **self.stats)
@@ -0,0 +1,345 @@
+from dtab.error import IllegalArgumentException
+from dtab.path import Path
+from dtab.tree import NameTree
+import struct
+import zlib
+
+MAGIC = b'DTAB'
+VERSION = 1
+HEADER = struct.Struct('<4sBBxxII')  # magic, version, flags, strings, dentries
+UINT = struct.Struct('<I')
+WEIGHT = struct.Struct('<d')
+NODE = struct.Struct('<III')  # wildcard, entry count, child count
+ANY_ELEM = 0xffffffff
+NONE = 0xffffffff
+
+FLAG_INDEX = 1
+
+TAG_NEG, TAG_FAIL, TAG_EMPTY, TAG_LEAF, TAG_ALT, TAG_UNION, TAG_WEIGHTED = range(7)
+
+
+class BinaryDtab(object):
+  """A dtab.dtab.Dtab in a compact binary encoding, read from any buffer
+     (bytes, bytearray, memoryview or mmap) without copying it.
+
+     The encoding is, all integers little-endian uint32:
+
+       header   'DTAB', version byte, flags byte, 2 pad bytes,
+                string count, dentry count
+       strings  string count + 1 offsets into the UTF-8 blob that
+                follows them; string i is blob[offsets[i]:offsets[i + 1]]
+       dentries dentry count + 1 absolute offsets of the dentry records
+                that follow them
+
+     A dentry record is its prefix (element count, then a string index
+     per element, 0xffffffff for AnyElem) followed by its NameTree in
+     preorder: a tag byte, then for a Leaf the element count and string
+     indices of its Path, for an Alt or Union the child count and the
+     children, and for a Weighted its float64 weight and tree.  Union
+     children are always Weighted.
+
+     Every label and path element is stored once in the string table.
+
+     With the FLAG_INDEX flag, the records are followed by a lookup index:
+
+       strings  slot count (a power of two), then a hash table of string
+                indices, 0xffffffff for empty slots, placed by the
+                crc32 of the UTF-8 string and probed linearly
+       trie     nodes of a trie over the dentry prefixes, the root
+                first.  A node is the offset of its wildcard child (or
+                0xffffffff), its entry count and its child count, then
+                the indices of the dentries whose prefix ends at it in
+                lookup order, then (string index, node offset) pairs
+                sorted by string index
+
+     so `matches` walks the buffer itself, like dtab.index.PrefixTrie.
+  """
+
+  @classmethod
+  def encode(cls, dtab, index=False):
+    """The encoding of `dtab` as bytes, with a lookup index if `index`
+       is set"""
+    # avoiding circular dependencies
+    from dtab.dtab import AnyElem
+    strings = []
+    string_ids = {}
+
+    def string_id(s):
+      index = string_ids.get(s)
+      if index is None:
+        index = string_ids[s] = len(strings)
+        strings.append(s)
+      return index
+
+    def encode_elems(elems, out):
+      out.append(UINT.pack(len(elems)))
+      out.extend(UINT.pack(string_id(e)) for e in elems)
+
+    def encode_tree(tree, out):
+      if tree is NameTree.Neg:
+        out.append(struct.pack('<B', TAG_NEG))
+      elif tree is NameTree.Fail:
+        out.append(struct.pack('<B', TAG_FAIL))
+      elif tree is NameTree.Empty:
+        out.append(struct.pack('<B', TAG_EMPTY))
+      elif isinstance(tree, NameTree.Leaf):
+        if not isinstance(tree.value, Path):
+          raise TypeError("{} is not a Leaf of a Path".format(tree))
+        out.append(struct.pack('<B', TAG_LEAF))
+        encode_elems(tree.value.elems, out)
+      elif isinstance(tree, (NameTree.Alt, NameTree.Union)):
+        tag = TAG_ALT if isinstance(tree, NameTree.Alt) else TAG_UNION
+        out.append(struct.pack('<BI', tag, len(tree.trees)))
+        for t in tree:
+          encode_tree(t, out)
+      elif isinstance(tree, NameTree.Weighted):
+        out.append(struct.pack('<Bd', TAG_WEIGHTED, tree.weight))
+        encode_tree(tree.tree, out)
+      else:
+        raise TypeError("{} can not be encoded".format(tree))
+
+    records = []
+    for dentry in dtab.dentries:
+      out = [UINT.pack(dentry.prefix.size)]
+      out.extend(UINT.pack(ANY_ELEM if e is AnyElem else string_id(e.buf))
+                 for e in dentry.prefix.elems)
+      encode_tree(dentry.nametree, out)
+      records.append(b''.join(out))
+
+    blobs = [s.encode('utf-8') for s in strings]
+    string_offsets = [0]
+    for blob in blobs:
+      string_offsets.append(string_offsets[-1] + len(blob))
+    position = (HEADER.size + UINT.size * (len(strings) + 1) + string_offsets[-1] +
+                UINT.size * (len(records) + 1))
+    dentry_offsets = [position]
+    for record in records:
+      dentry_offsets.append(dentry_offsets[-1] + len(record))
+
+    flags = 0
+    sections = []
+    if index:
+      flags |= FLAG_INDEX
+      # prefixes were all added to the string table above
+      sections = cls._encode_index(dtab, blobs, string_ids, dentry_offsets[-1])
+
+    return b''.join(
+        [HEADER.pack(MAGIC, VERSION, flags, len(strings), len(records))] +
+        [UINT.pack(o) for o in string_offsets] + blobs +
+        [UINT.pack(o) for o in dentry_offsets] + records + sections)
+
+  @classmethod
+  def _encode_index(cls, dtab, blobs, string_ids, position):
+    # avoiding circular dependencies
+    from dtab.dtab import AnyElem
+    slots = 1
+    while slots < 2 * len(blobs):
+      slots *= 2
+    table = [NONE] * slots
+    for i, blob in enumerate(blobs):
+      slot = zlib.crc32(blob) & (slots - 1)
+      while table[slot] != NONE:
+        slot = (slot + 1) & (slots - 1)
+      table[slot] = i
+
+    # nodes are [wildcard, entries, children] with node numbers for edges
+    nodes = [[None, [], {}]]
+    for i in reversed(range(dtab.length)):
+      node = nodes[0]
+      for elem in dtab.dentries[i].prefix.elems:
+        if elem is AnyElem:
+          if node[0] is None:
+            node[0] = len(nodes)
+            nodes.append([None, [], {}])
+          node = nodes[node[0]]
+        else:
+          sid = string_ids[elem.buf]
+          if sid not in node[2]:
+            node[2][sid] = len(nodes)
+            nodes.append([None, [], {}])
+          node = nodes[node[2][sid]]
+      node[1].append(i)
+
+    offsets = []
+    position += UINT.size * (slots + 1)
+    for wildcard, entries, children in nodes:
+      offsets.append(position)
+      position += NODE.size + UINT.size * (len(entries) + 2 * len(children))
+
+    out = [UINT.pack(slots), struct.pack('<{}I'.format(slots), *table)]
+    for wildcard, entries, children in nodes:
+      out.append(NODE.pack(NONE if wildcard is None else offsets[wildcard],
+                           len(entries), len(children)))
+      out.extend(UINT.pack(i) for i in entries)
+      for sid in sorted(children):
+        out.append(struct.pack('<II', sid, offsets[children[sid]]))
+    return out
+
+  def __init__(self, buf):
+    self._buf = memoryview(buf)
+    if len(self._buf) < HEADER.size:
+      raise IllegalArgumentException("encoded dtab is truncated")
+    magic, version, flags, self._nstrings, self._length = HEADER.unpack_from(self._buf, 0)
+    if magic != MAGIC:
+      raise IllegalArgumentException("not an encoded dtab: {!r}".format(magic))
+    if version != VERSION:
+      raise IllegalArgumentException("unsupported encoded dtab version {}".format(version))
+    self._string_offsets = HEADER.size
+    self._blob = self._string_offsets + UINT.size * (self._nstrings + 1)
+    self._dentry_offsets = self._blob + self.uint(self._string_offsets + UINT.size * self._nstrings)
+    self._strings = [None] * self._nstrings
+    self._slots = None
+    if flags & FLAG_INDEX:
+      table = self.uint(self._dentry_offsets + UINT.size * self._length)
+      self._slots = self.uint(table)
+      self._table = table + UINT.size
+      self._root = self._table + UINT.size * self._slots
+    # avoiding circular dependencies
+    from dtab.dtab import AnyElem, Dentry, Dtab
+    self._any_elem = AnyElem
+    self._dentry_cls = Dentry
+    self._dtab_cls = Dtab
+
+  @property
+  def buffer(self):
+    return self._buf
+
+  @property
+  def length(self):
+    return self._length
+
+  @property
+  def indexed(self):
+    """Whether the buffer holds a lookup index, see `matches`"""
+    return self._slots is not None
+
+  def uint(self, offset):
+    return UINT.unpack_from(self._buf, offset)[0]
+
+  def string(self, index):
+    """String `index` of the string table, decoded once"""
+    s = self._strings[index]
+    if s is None:
+      s = self._strings[index] = str(self._string_bytes(index), 'utf-8')
+    return s
+
+  def _string_bytes(self, index):
+    start = self._blob + self.uint(self._string_offsets + UINT.size * index)
+    end = self._blob + self.uint(self._string_offsets + UINT.size * (index + 1))
+    return self._buf[start:end]
+
+  def string_id(self, s):
+    """Index of string `s` in the string table through the lookup
+       index, or None if it is not there"""
+    blob = s.encode('utf-8')
+    mask = self._slots - 1
+    slot = zlib.crc32(blob) & mask
+    while True:
+      index = self.uint(self._table + UINT.size * slot)
+      if index == NONE:
+        return None
+      if self._string_bytes(index) == blob:
+        return index
+      slot = (slot + 1) & mask
+
+  def _child(self, node, count, sid):
+    # binary search of the (string index, node offset) pairs of `node`
+    lo, hi = 0, count
+    while lo < hi:
+      mid = (lo + hi) // 2
+      key = self.uint(node + 8 * mid)
+      if key == sid:
+        return self.uint(node + 8 * mid + UINT.size)
+      elif key < sid:
+        lo = mid + 1
+      else:
+        hi = mid
+    return None
+
+  def matches(self, path):
+    """List of the indices of the dentries whose prefixes match `path`,
+       in lookup order, read from the lookup index"""
+    if self._slots is None:
+      raise IllegalArgumentException("encoded dtab has no lookup index")
+    found = []
+    frontier = [self._root]
+    for depth in range(len(path.elems) + 1):
+      if not frontier:
+        break
+      step = []
+      sid = self.string_id(path.elems[depth]) if depth < len(path.elems) else None
+      for node in frontier:
+        wildcard, entries, children = NODE.unpack_from(self._buf, node)
+        found.extend(struct.unpack_from('<{}I'.format(entries), self._buf, node + NODE.size))
+        if depth == len(path.elems):
+          continue
+        if sid is not None and children:
+          child = self._child(node + NODE.size + UINT.size * entries, children, sid)
+          if child is not None:
+            step.append(child)
+        if wildcard != NONE:
+          step.append(wildcard)
+      frontier = step
+    if len(found) > 1:
+      found.sort(reverse=True)
+    return found
+
+  def record(self, index):
+    """Offset of the record of dentry `index`"""
+    if not 0 <= index < self._length:
+      raise IndexError(index)
+    return self.uint(self._dentry_offsets + UINT.size * index)
+
+  def _elems(self, offset):
+    count = self.uint(offset)
+    ids = struct.unpack_from('<{}I'.format(count), self._buf, offset + UINT.size)
+    return ids, offset + UINT.size * (count + 1)
+
+  def prefix_ids(self, index):
+    """Tuple of the string indices of the prefix of dentry `index`,
+       with None for AnyElem"""
+    ids, _ = self._elems(self.record(index))
+    return tuple(None if i == ANY_ELEM else i for i in ids)
+
+  def prefix(self, index):
+    ids, _ = self._elems(self.record(index))
+    return self._dentry_cls.Prefix(*[
+        self._any_elem if i == ANY_ELEM else self._dentry_cls.Prefix.Label(self.string(i))
+        for i in ids])
+
+  def nametree(self, index):
+    _, offset = self._elems(self.record(index))
+    tree, _ = self._tree(offset)
+    return tree
+
+  def _tree(self, offset):
+    tag = self._buf[offset]
+    offset += 1
+    if tag == TAG_NEG:
+      return NameTree.Neg, offset
+    if tag == TAG_FAIL:
+      return NameTree.Fail, offset
+    if tag == TAG_EMPTY:
+      return NameTree.Empty, offset
+    if tag == TAG_LEAF:
+      ids, offset = self._elems(offset)
+      return NameTree.Leaf(Path.from_tuple(tuple(self.string(i) for i in ids))), offset
+    if tag == TAG_ALT or tag == TAG_UNION:
+      count = self.uint(offset)
+      offset += UINT.size
+      trees = []
+      for _ in range(count):
+        tree, offset = self._tree(offset)
+        trees.append(tree)
+      return (NameTree.Alt if tag == TAG_ALT else NameTree.Union)(*trees), offset
+    if tag == TAG_WEIGHTED:
+      weight = WEIGHT.unpack_from(self._buf, offset)[0]
+      tree, offset = self._tree(offset + WEIGHT.size)
+      return NameTree.Weighted(weight, tree), offset
+    raise IllegalArgumentException("unknown tag {} at offset {}".format(tag, offset - 1))
+
+  def dentry(self, index):
+    return self._dentry_cls(self.prefix(index), self.nametree(index))
+
+  def to_dtab(self):
+    return self._dtab_cls([self.dentry(i) for i in range(self._length)])
@@ -0,0 +1,89 @@
+from dtab.path import Path
+from dtab.tree import NameTree
+
+
+class CompiledDtab(object):
+  """A dtab.dtab.Dtab specialized for lookup.
+
+     Prefixes are grouped by shape, their length and the positions of
+     their wildcards.  Each shape holds a dict keyed by the labels of its
+     prefixes, so matching a path is one dict probe per distinct shape
+     and never a scan over dentries.  Every destination NameTree is
+     prebuilt into a template that only concatenates the lookup suffix
+     onto its leaves.
+
+     `lookup` gives the same results as Dtab.lookup.
+  """
+
+  def __init__(self, dtab):
+    # avoiding circular dependencies
+    from dtab.dtab import AnyElem
+    self._dtab = dtab
+    shapes = {}
+    for rank, dentry in enumerate(dtab):
+      elems = dentry.prefix.elems
+      labels = tuple(i for i, e in enumerate(elems) if e is not AnyElem)
+      key = tuple(elems[i].buf for i in labels)
+      entries = shapes.setdefault((len(elems), labels), {}).setdefault(key, [])
+      entries.append((rank, len(elems), self.template(dentry.nametree)))
+    # (prefix size, slice or label positions, {labels: entries}) by size
+    self._shapes = []
+    for (size, labels), table in sorted(shapes.items()):
+      if labels == tuple(range(size)):
+        project = slice(0, size)
+      else:
+        project = labels
+      self._shapes.append((size, project, table))
+
+  @property
+  def dtab(self):
+    return self._dtab
+
+  @classmethod
+  def template(cls, tree):
+    """A function of a path's elements and a start index that builds
+       `tree` with the elements from the start appended to each leaf path"""
+    if isinstance(tree, NameTree.Leaf):
+      head = Path(tree)
+      return lambda elems, start: NameTree.Leaf(head.concat(elems, start))
+    if isinstance(tree, NameTree.Alt):
+      templates = [cls.template(t) for t in tree]
+      return lambda elems, start: NameTree.Alt(*[t(elems, start) for t in templates])
+    if isinstance(tree, NameTree.Union):
+      templates = [cls.template(t) for t in tree]
+      return lambda elems, start: NameTree.Union(*[t(elems, start) for t in templates])
+    if isinstance(tree, NameTree.Weighted):
+      weight, template = tree.weight, cls.template(tree.tree)
+      return lambda elems, start: NameTree.Weighted(weight, template(elems, start))
+    return lambda elems, start: tree
+
+  def matches(self, path):
+    """List[(rank, prefix size, template)] matching `path`, in rank order"""
+    elems = path.elems
+    size = len(elems)
+    found = []
+    for length, project, table in self._shapes:
+      if length > size:
+        break
+      if project.__class__ is slice:
+        key = elems[project]
+      else:
+        key = tuple([elems[i] for i in project])
+      hit = table.get(key)
+      if hit is not None:
+        found.extend(hit)
+    if len(found) > 1:
+      found.sort(key=lambda entry: entry[0])
+    return found
+
+  def lookup(self, path, simplify=False):
+    """Lookup the given `path`, as Dtab.lookup does"""
+    elems = path.elems
+    matches = [template(elems, length) for _, length, template in self.matches(path)]
+    if not matches:
+      return NameTree.Neg
+    elif len(matches) == 1:
+      tree = matches[0]
+    else:
+      tree = NameTree.Alt(*matches)
+    return tree.simplified if simplify else tree
@@ -0,0 +1,98 @@
+from bisect import bisect_left
+from collections import deque
+
+
+class DtabDiff(object):
+  """The changes from one dtab.dtab.Dtab to another.
+
+     `added` is a list of (new index, Dentry), `removed` a list of (old
+     index, Dentry) and `moved` a list of (old index, new index, Dentry)
+     for dentries in both dtabs whose order relative to the unchanged
+     dentries differs.  Lookup priority follows dentry order, so a
+     lookup can only differ between the two dtabs if one of the
+     `changed` dentries matches it.
+  """
+
+  def __init__(self, added, removed, moved):
+    self.added = added
+    self.removed = removed
+    self.moved = moved
+
+  @property
+  def changed(self):
+    """List[Dentry] added, removed or moved"""
+    return ([d for _, d in self.removed] + [d for _, d in self.added] +
+            [d for _, _, d in self.moved])
+
+  @property
+  def is_empty(self):
+    return not (self.added or self.removed or self.moved)
+
+  @property
+  def show(self):
+    lines = ["-{} {}".format(i, d.show) for i, d in self.removed]
+    lines.extend("+{} {}".format(j, d.show) for j, d in self.added)
+    lines.extend("~{}->{} {}".format(i, j, d.show) for i, j, d in self.moved)
+    return "\n".join(lines)
+
+  def __str__(self):
+    return "DtabDiff({} added, {} removed, {} moved)".format(
+        len(self.added), len(self.removed), len(self.moved))
+
+
+def increasing_run(values):
+  """Indices of a longest strictly increasing subsequence of `values`"""
+  tails = []  # tails[k] is the smallest tail value of a run of length k + 1
+  tail_indices = []
+  previous = [None] * len(values)
+  for i, value in enumerate(values):
+    k = bisect_left(tails, value)
+    if k == len(tails):
+      tails.append(value)
+      tail_indices.append(i)
+    else:
+      tails[k] = value
+      tail_indices[k] = i
+    previous[i] = tail_indices[k - 1] if k else None
+  run = []
+  i = tail_indices[-1] if tail_indices else None
+  while i is not None:
+    run.append(i)
+    i = previous[i]
+  run.reverse()
+  return run
+
+
+def diff(old, new):
+  """DtabDiff from Dtab `old` to Dtab `new`.
+
+     Common leading and trailing dentries are skipped.  In between, the
+     k-th occurrence of a dentry in `old` is paired with its k-th
+     occurrence in `new` by structural hash, and the pairs kept in place
+     are a longest run of them in the same order in both, found in
+     O(n log n).  The other pairs are moved.
+  """
+  a, b = old.dentries, new.dentries
+  start = 0
+  while start < len(a) and start < len(b) and a[start] == b[start]:
+    start += 1
+  end = 0
+  while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+    end += 1
+
+  positions = {}
+  for j in range(start, len(b) - end):
+    positions.setdefault(b[j], deque()).append(j)
+  pairs = []
+  removed = []
+  for i in range(start, len(a) - end):
+    candidates = positions.get(a[i])
+    if candidates:
+      pairs.append((i, candidates.popleft()))
+    else:
+      removed.append((i, a[i]))
+  added = sorted((j, b[j]) for candidates in positions.values() for j in candidates)
+
+  kept = set(increasing_run([j for _, j in pairs]))
+  moved = [(i, j, a[i]) for k, (i, j) in enumerate(pairs) if k not in kept]
+  return DtabDiff(added, removed, moved)
@@ -1,5 +1,11 @@
+from dtab.analysis import dead_dentries
+from dtab.cache import LRUCache
+from dtab.codec import BinaryDtab
+from dtab.compiled import CompiledDtab
+from dtab.diff import diff
+from dtab.index import DentrySegment, SegmentedIndex
 from dtab.parser import NameTreeParsers
-from dtab.name import Name
+from dtab.naming import DefaultInterpreter
 from dtab.path import Path
 from dtab.tree import NameTree
 
@@ -33,9 +39,27 @@ class DtabBase(type):
   def base(cls, value):
     if isinstance(value, cls):
       cls._base = value
+      for listener in list(cls.base_listeners):
+        listener(value)
       return cls._base
     raise TypeError("{} is not derived from {}".format(value, cls.__name__))
 
+  @property
+  def base_listeners(cls):
+    """Callables called with each Dtab assigned to `base`, see
+       watch_base"""
+    if not hasattr(cls, '_base_listeners'):
+      cls._base_listeners = []
+    return cls._base_listeners
+
+  def watch_base(cls, listener):
+    """Call `listener(dtab)` each time a dtab is assigned to `base`"""
+    cls.base_listeners.append(listener)
+
+  def unwatch_base(cls, listener):
+    if listener in cls.base_listeners:
+      cls.base_listeners.remove(listener)
+
 
 class Dtab(DtabBase('DtabBase', (object,), {})):
   """A Dtab (short for delegation table) comprises a sequence of
@@ -46,7 +70,7 @@ class Dtab(DtabBase('DtabBase', (object,), {})):
   """
 
   @classmethod
-  def read(cls, s):
+  def read(cls, s, lazy=False, fast=None):
     """Parse a Dtab from string `s` whit concrete syntax
 
        {{{
@@ -55,81 +79,259 @@ class Dtab(DtabBase('DtabBase', (object,), {})):
 
        where the production `dentry` is from the grammar documented in
        dtab.Dentry.read
+
+       With `lazy`, only the dentry prefixes are parsed, and the tree of
+       each dentry is parsed the first time it matches a lookup or is
+       accessed, see LazyDentry.  Errors in trees are then raised on
+       access, or all at once by Dtab.validate.
+
+       `fast` selects dtab.parser.FastNameTreeParsers, which builds the
+       same Dtab and raises the same errors.  By default it is used for
+       lazy reads only.
     """
-    return NameTreeParsers.parseDtab(s)
+    if fast is None:
+      fast = lazy
+    if lazy:
+      return NameTreeParsers.parseLazyDtab(s, fast)
+    return NameTreeParsers.parseDtab(s, fast)
+
+  @classmethod
+  def iter_read(cls, fileobj, chunk_size=65536):
+    """Generator of the Dentry of a dtab read in chunks from the
+       file-like `fileobj`, with the concrete syntax of Dtab.read.  Each
+       Dentry is yielded once its terminating `;` is parsed, see
+       NameTreeParsers.iterDentries"""
+    return NameTreeParsers.iterDentries(fileobj, chunk_size=chunk_size)
+
+  @classmethod
+  def from_bytes(cls, buf):
+    """Decode a Dtab encoded by Dtab.to_bytes from `buf`, which can be
+       bytes or a memoryview or mmap that is read without copying.
+       See dtab.codec.BinaryDtab"""
+    return BinaryDtab(buf).to_dtab()
+
+  def to_bytes(self, index=False):
+    """Compact binary encoding of this Dtab, with a lookup index if
+       `index` is set, see dtab.codec.BinaryDtab"""
+    return BinaryDtab.encode(self, index)
 
   def __init__(self, delegation_table):
-    self._dentries = []
+    dentries = []
     for args in delegation_table:
       if isinstance(args, Dentry):
-        self._dentries.append(args)
+        dentries.append(args)
       elif isinstance(args, list):
-        self._dentries.append(Dentry(*args))
+        dentries.append(Dentry(*args))
       else:
         raise TypeError("Input must be coercible to a  Dentry")
-    self._public = [d for d in self._dentries]
-    self._dentries.reverse()  # must invert the List[Dentry] for lookup
+    self._init_segments(DentrySegment.concat((), [DentrySegment(dentries)]))
+
+  @classmethod
+  def from_segments(cls, segments):
+    """A Dtab over the DentrySegment sequence `segments`, sharing them"""
+    instance = cls.__new__(cls)
+    instance._init_segments(tuple(segments))
+    return instance
+
+  def _init_segments(self, segments):
+    # Dtab is immutable: its dentries live in shared, immutable segments
+    self._segments = segments
+    self._length = sum(len(segment) for segment in segments)
+    self._dentries = None
+    self._index = None
+    self._compiled = None
+    self._lookup_cache = None
+
+  @property
+  def segments(self):
+    return self._segments
 
   @property
   def dentries(self):
-    """List[Dentry] provided to the Dtab's constructor"""
-    return self._public
+    """Tuple[Dentry] provided to the Dtab's constructor"""
+    if self._dentries is None:
+      if len(self._segments) == 1:
+        self._dentries = self._segments[0].dentries
+      else:
+        self._dentries = tuple(d for segment in self._segments for d in segment.dentries)
+    return self._dentries
 
   @property
   def length(self):
     """Represents the number of Dentry instances mapped"""
-    return len(self._public)
+    return self._length
 
   @property
   def is_empty(self):
     return self.length == 0
 
-  def lookup(self, path):
-    """Lookup the given `path` with this dtab"""
+  @property
+  def index(self):
+    """SegmentedIndex over the segments' prefix tries"""
+    if self._index is None:
+      self._index = SegmentedIndex(self._segments)
+    return self._index
+
+  def lookup(self, path, simplify=False):
+    """Lookup the given `path` with this dtab, simplifying the
+       resulting NameTree when `simplify` is set"""
+    cache = self._lookup_cache
+    if cache is not None:
+      return cache.get_or_load(
+          (path.elems, simplify), lambda: self.rewrite(path, self.index.matches(path), simplify))
+    return self.rewrite(path, self.index.matches(path), simplify)
+
+  def cache_lookups(self, maxsize=1024):
+    """A new Dtab sharing the segments of this one that caches the
+       results of `lookup` for up to `maxsize` paths, evicting the least
+       recently used.  A Dtab never changes, so cached results can not
+       go stale.  This Dtab is left as is, as read dtabs may be shared,
+       see NameTreeParsers.cache; dtabs derived from the new one start
+       without a cache"""
+    dtab = self.__class__.from_segments(self.segments)
+    dtab._lookup_cache = LRUCache(maxsize)
+    return dtab
+
+  @property
+  def lookup_cache(self):
+    """The LRUCache of `lookup` results, with its hit, miss and eviction
+       `stats`, or None unless cache_lookups was called"""
+    return self._lookup_cache
+
+  def lookup_many(self, paths, simplify=False):
+    """Lookup each of `paths`, returning List[NameTree] in input order.
+
+       Paths sharing leading elements are matched against the dentry
+       prefixes together, see dtab.index.PrefixTrie.matches_many, equal
+       paths are looked up once, and a dentry's tree is rewritten once
+       per distinct rest of the paths it matches, see rewrite.  Cached
+       lookups, see cache_lookups, are looked up one by one instead.
+    """
+    paths = list(paths)
+    if self._lookup_cache is not None:
+      return [self.lookup(path, simplify) for path in paths]
+    positions = {}
+    distinct = []
+    for path in paths:
+      if positions.setdefault(path.elems, len(distinct)) == len(distinct):
+        distinct.append(path)
+    memo = {}
+    trees = [self.rewrite(path, dentries, simplify, memo)
+             for path, dentries in zip(distinct, self.index.matches_many(distinct))]
+    return [trees[positions[path.elems]] for path in paths]
+
+  def iter_lookup(self, paths, simplify=False, batch_size=1024):
+    """Generator of lookup results of the iterable `paths`, in order,
+       matching up to `batch_size` paths at a time with lookup_many"""
+    batch = []
+    for path in paths:
+      batch.append(path)
+      if len(batch) >= batch_size:
+        for tree in self.lookup_many(batch, simplify):
+          yield tree
+        batch = []
+    for tree in self.lookup_many(batch, simplify):
+      yield tree
+
+  @staticmethod
+  def rewrite(path, dentries, simplify=False, memo=None):
+    """The lookup result of `path` given the `dentries` it matches, in
+       lookup order.
+
+       A dentry rewrites every path with the same elements past its
+       prefix to the same tree, so with a `memo` dict, kept across the
+       calls for the paths of a batch, each such tree is built once.
+    """
+    elems = path.elems
     matches = []
-    # don't use public dentries
-    for dentry in self._dentries:
-      if dentry.prefix.matches(path):
-        suffix = path.elems[dentry.prefix.size:]
-        matches.append(dentry.nametree.map(
-            lambda pfx: Name.Path(pfx + suffix)))
+    for dentry in dentries:
+      # leaves share the elements of `path` rather than copying them
+      size = dentry.prefix.size
+      if memo is None:
+        matches.append(dentry.nametree.map(lambda pfx: pfx.value.concat(elems, size)))
+        continue
+      key = (id(dentry), elems[size:])
+      tree = memo.get(key)
+      if tree is None:
+        tree = memo[key] = dentry.nametree.map(lambda pfx: pfx.value.concat(elems, size))
+      matches.append(tree)
     if not len(matches):
       return NameTree.Neg
     elif len(matches) == 1:
-      return matches[0]
-    return NameTree.Alt(*matches)
+      tree = matches[0]
+    else:
+      tree = NameTree.Alt(*matches)
+    return tree.simplified if simplify else tree
+
+  def diff(self, other):
+    """dtab.diff.DtabDiff of the dentries added, removed and moved from
+       this dtab to `other`"""
+    return diff(self, other)
+
+  def dead_dentries(self):
+    """List[dtab.analysis.DeadDentry] of the dentries no binding can
+       select, see dtab.analysis.dead_dentries"""
+    return dead_dentries(self)
+
+  def pruned(self):
+    """This Dtab without its dead dentries.  Bindings through it select
+       the same branches, although looked up trees no longer hold the
+       unreachable ones"""
+    dead = set(d.index for d in self.dead_dentries())
+    if not dead:
+      return self
+    return Dtab([d for i, d in enumerate(self.dentries) if i not in dead])
+
+  def validate(self):
+    """Parse every dentry of a lazily read Dtab not parsed yet, raising
+       the IllegalArgumentException of the first invalid one.  Returns
+       this Dtab"""
+    for dentry in self.dentries:
+      dentry.nametree
+    return self
+
+  def compile(self):
+    """CompiledDtab specialized for looking up paths in this dtab,
+       built on first use"""
+    if self._compiled is None:
+      self._compiled = CompiledDtab(self)
+    return self._compiled
+
+  def bind(self, path, max_depth=None):
+    """Bind `path` recursively through this dtab, down to namer paths.
+       See dtab.naming.DefaultInterpreter"""
+    return DefaultInterpreter(self, max_depth).bind(path)
 
   def __iter__(self):
-    return iter(self._dentries)
+    """Iterates the dentries in lookup order, last dentry first"""
+    return reversed(self.dentries)
 
   def __add__(self, other):
+    """Concatenates in O(len(other)), sharing this dtab's segments"""
     if isinstance(other, Dentry):
       return self.copy(dentry=other)
-    elif isinstance(other, Dtab) and not other.is_empty:
-      elems = other.dentries
-      while True:
-        instance = self.copy(dentry=elems.pop(0))
-        if not len(elems):
-          return instance
     elif isinstance(other, Dtab) and other.is_empty:
       return self
     elif isinstance(other, Dtab) and self.is_empty:
       return other
+    elif isinstance(other, Dtab):
+      return self.__class__.from_segments(
+          DentrySegment.concat(self.segments, other.segments))
     raise TypeError("unsupported operand type(s) for +: '{}' and '{}'".format(
         type(self).__name__, type(other).__name__))
 
   def __eq__(self, other):
-    return self.__str__() == other.__str__()
+    if self is other:
+      return True
+    return isinstance(other, Dtab) and self.dentries == other.dentries
 
   def __ne__(self, other):
     return not self.__eq__(other)
 
   def copy(self, dentry=None):
     """Constructs a new Dtab with `dentry` appended if provided"""
-    dentries = self.dentries
-    if dentry:
-      dentries.append(dentry)
-    return self.__class__(dentries)
+    others = [DentrySegment([dentry])] if dentry else []
+    return self.__class__.from_segments(DentrySegment.concat(self.segments, others))
 
   @property
   def show(self):
@@ -177,6 +379,12 @@ class Dentry(DentryBase('DentryBase', (object,), {})):
     """
     return NameTreeParsers.parseDentry(s)
 
+  @classmethod
+  def iter_read(cls, fileobj, chunk_size=65536):
+    """Generator of the `;` separated Dentry read from `fileobj`, see
+       Dtab.iter_read"""
+    return NameTreeParsers.iterDentries(fileobj, chunk_size=chunk_size)
+
   def __init__(self, prefix, nametree):
     """`prefix` describes the paths that the entry applies to.
        `nametree` describes the resulting tree for this prefix on lookup."""
@@ -197,8 +405,16 @@ class Dentry(DentryBase('DentryBase', (object,), {})):
     return self._prefix
 
   def __eq__(self, other):
-    return ((other.prefix.show == self.prefix.show) and
-            (other.nametree.show == self.nametree.show))
+    if self is other:
+      return True
+    return (isinstance(other, Dentry) and other.prefix == self.prefix and
+            other.nametree == self.nametree)
+
+  def __ne__(self, other):
+    return not self.__eq__(other)
+
+  def __hash__(self):
+    return hash((self.prefix, self.nametree))
 
   @property
   def show(self):
@@ -208,6 +424,29 @@ class Dentry(DentryBase('DentryBase', (object,), {})):
     return 'Dentry({})'.format(self.show)
 
 
+class LazyDentry(Dentry):
+  """A Dentry whose NameTree is produced by calling `parse` on first
+     access, see Dtab.read"""
+
+  def __init__(self, prefix, parse):
+    if not isinstance(prefix, self.__class__.Prefix):
+      raise TypeError("'{}' is not derived from {}.{}".format(
+          prefix, self.__class__.__name__, self.__class__.Prefix.__name__))
+    self._prefix = prefix
+    self._parse = parse
+    self._nametree = None
+
+  @property
+  def parsed(self):
+    return self._nametree is not None
+
+  @property
+  def nametree(self):
+    if self._nametree is None:
+      self._nametree = self._parse()
+    return self._nametree
+
+
 class Elem(object):
 
   def __ne__(self, other):
@@ -249,6 +488,10 @@ class Label(Elem):
       return self.buf == other.buf
     return other == self.buf
 
+  def __hash__(self):
+    # a Label equals its bare buf, so it must hash like it
+    return hash(self.buf)
+
 
 class PrefixBase(type):
   AnyElem = property(lambda _: AnyElem)
@@ -298,12 +541,9 @@ class Prefix(PrefixBase('PrefixBase', (object,), {})):
     return NameTreeParsers.parseDentryPrefix(s)
 
   def __init__(self, *elems):
-    self._elems = []
-    for e in elems:
-      if isinstance(e, Elem):
-        self._elems.append(e)
-        continue
-      self._elems.append(Label(e))
+    self._elems = tuple(e if isinstance(e, Elem) else Label(e) for e in elems)
+    # AnyElem equals every element, so it is keyed as None instead
+    self._key = tuple(None if e is AnyElem else e.buf for e in self._elems)
 
   @property
   def size(self):
@@ -327,5 +567,14 @@ class Prefix(PrefixBase('PrefixBase', (object,), {})):
   def show(self):
     return ",".join([str(e) for e in self.elems])
 
+  def __eq__(self, other):
+    return isinstance(other, Prefix) and self._key == other._key
+
+  def __ne__(self, other):
+    return not self.__eq__(other)
+
+  def __hash__(self):
+    return hash(self._key)
+
   def __str__(self):
     return "Prefix({})".format(self.show)
@@ -0,0 +1,73 @@
+from collections import defaultdict, deque
+from dtab.dtab import Dtab
+from dtab.parser import NameTreeParsers, scan_dentries
+
+
+class IncrementalReader(object):
+  """Re-reads edited dtab documents, parsing only the dentries that changed.
+
+     The reader remembers the source text of every dentry of the last
+     document it read.  When a new document is read, the dentries are
+     found with dtab.parser.scan_dentries, and only those whose text is
+     not in the previous document are parsed; the others reuse the
+     previous Dentry objects.  Reload cost then scales with the size of
+     the edit rather than the size of the document.
+
+     The result, and any IllegalArgumentException raised, are the same
+     as Dtab.read of the whole document.
+  """
+
+  def __init__(self, source="", dtab=None, fast=False):
+    """`source` is the document last read, and `dtab` its parsed Dtab if
+       already known"""
+    self._fast = fast
+    self.reused = 0
+    self.parsed = 0
+    if dtab is None:
+      dtab = NameTreeParsers.parseDtab(source, fast=fast)
+    self._remember(source, dtab)
+
+  @property
+  def source(self):
+    return self._source
+
+  @property
+  def dtab(self):
+    return self._dtab
+
+  def _remember(self, source, dtab):
+    texts = [source[start:end] for start, end, _ in scan_dentries(source)]
+    texts = [text for text in texts if text]
+    self._previous = defaultdict(deque)
+    if len(texts) == dtab.length:
+      for text, dentry in zip(texts, dtab.dentries):
+        self._previous[text].append(dentry)
+    self._source = source
+    self._dtab = dtab
+
+  def read(self, source):
+    """The Dtab of `source`, reusing unchanged dentries of the last read"""
+    spans = scan_dentries(source)
+    if any(start == end for start, end, _ in spans[:-1]):
+      # an empty dentry is an error, let the parser report it
+      dtab = NameTreeParsers.parseDtab(source, fast=self._fast)
+      self._remember(source, dtab)
+      return dtab
+
+    parser = None
+    dentries = []
+    for start, end, stop in spans:
+      if start == end:
+        continue
+      previous = self._previous.get(source[start:end])
+      if previous:
+        dentries.append(previous.popleft())
+        self.reused += 1
+        continue
+      if parser is None:
+        parser = NameTreeParsers.parser(source, self._fast)
+      dentries.append(parser.parse_dentry_at(start, stop))
+      self.parsed += 1
+    dtab = Dtab(dentries)
+    self._remember(source, dtab)
+    return dtab
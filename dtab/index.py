@@ -0,0 +1,191 @@
+class PrefixTrieNode(object):
+  __slots__ = ('children', 'wildcard', 'entries')
+
+  def __init__(self):
+    self.children = {}
+    self.wildcard = None
+    self.entries = []
+
+
+class PrefixTrie(object):
+  """A trie over the prefixes of a sequence of dtab.dtab.Dentry.
+
+     Each edge is keyed by the buf of a dtab.dtab.Label; dtab.dtab.AnyElem
+     elements follow a separate wildcard edge.  A dentry is stored on the
+     node its prefix ends at, together with its rank in the input
+     sequence, so a lookup only visits the dentries whose prefixes can
+     match the path and still returns them in input order.
+  """
+
+  def __init__(self, dentries):
+    # avoiding circular dependencies
+    from dtab.dtab import AnyElem
+    self._any = AnyElem
+    self._root = PrefixTrieNode()
+    self._length = 0
+    for dentry in dentries:
+      self.insert(dentry)
+
+  @property
+  def root(self):
+    return self._root
+
+  @property
+  def length(self):
+    return self._length
+
+  def insert(self, dentry):
+    """Add `dentry` with a lower priority than every dentry already added"""
+    node = self._root
+    for elem in dentry.prefix.elems:
+      if elem is self._any:
+        if node.wildcard is None:
+          node.wildcard = PrefixTrieNode()
+        node = node.wildcard
+      else:
+        child = node.children.get(elem.buf)
+        if child is None:
+          child = node.children[elem.buf] = PrefixTrieNode()
+        node = child
+    node.entries.append((self._length, dentry))
+    self._length += 1
+
+  def matches(self, path):
+    """List[Dentry] whose prefixes match `path`, in input order"""
+    found = list(self._root.entries)
+    frontier = [self._root]
+    for elem in path.elems:
+      step = []
+      for node in frontier:
+        child = node.children.get(elem)
+        if child is not None:
+          step.append(child)
+        if node.wildcard is not None:
+          step.append(node.wildcard)
+      if not step:
+        break
+      for node in step:
+        found.extend(node.entries)
+      frontier = step
+    if len(found) > 1:
+      # ranks are unique, so entries sort by rank without a key
+      found.sort()
+    return [dentry for _, dentry in found]
+
+  def matches_many(self, paths):
+    """List[List[Dentry]], the matches of each of `paths` in order.
+
+       Paths are matched in sorted order, keeping the trie nodes and
+       entries reached after each element of the last path, so a path
+       only walks the trie past the leading elements it shares with the
+       one before it, and equal paths share one result list.  Entries
+       are only copied where a node adds to them, and only sorted into
+       rank order once per path.
+    """
+    results = [None] * len(paths)
+    # levels[k] is the frontier and entries reached after k elements
+    levels = [([self._root], self._root.entries)]
+    last, last_index = None, None
+    for elems, i in sorted((path.elems, i) for i, path in enumerate(paths)):
+      if elems == last:
+        results[i] = results[last_index]
+        continue
+      shared = 0
+      if last is not None:
+        limit = min(len(elems), len(last), len(levels) - 1)
+        while shared < limit and elems[shared] == last[shared]:
+          shared += 1
+      del levels[shared + 1:]
+      frontier, found = levels[shared]
+      for elem in elems[shared:]:
+        step = []
+        extended = found
+        for node in frontier:
+          child = node.children.get(elem)
+          if child is not None:
+            step.append(child)
+            if child.entries:
+              extended = extended + child.entries
+          if node.wildcard is not None:
+            step.append(node.wildcard)
+            if node.wildcard.entries:
+              extended = extended + node.wildcard.entries
+        if not step:
+          break
+        frontier, found = step, extended
+        levels.append((frontier, found))
+      # ranks are unique, so entries sort by rank without a key
+      results[i] = [dentry for _, dentry in sorted(found)]
+      last, last_index = elems, i
+    return results
+
+
+class DentrySegment(object):
+  """An immutable run of dtab.dtab.Dentry with its own PrefixTrie.
+
+     Segments are shared between every Dtab built from them, so a
+     concatenated Dtab reuses the tries of the segments it was built
+     from instead of indexing all of its dentries again.
+  """
+  __slots__ = ('_dentries', '_index')
+
+  def __init__(self, dentries):
+    self._dentries = tuple(dentries)
+    self._index = None
+
+  @property
+  def dentries(self):
+    return self._dentries
+
+  @property
+  def index(self):
+    """PrefixTrie over the inverted dentries, built on first use"""
+    if self._index is None:
+      self._index = PrefixTrie(reversed(self._dentries))
+    return self._index
+
+  def __len__(self):
+    return len(self._dentries)
+
+  @classmethod
+  def concat(cls, segments, others):
+    """The segments of `segments` followed by `others`.
+
+       A segment is merged into the one before it while that one is no
+       longer than it, so a small segment appended to a large one is
+       kept as is, and a dtab built by repeated appends holds a
+       logarithmic number of segments.
+    """
+    result = list(segments)
+    for segment in others:
+      if not len(segment):
+        continue
+      while result and len(result[-1]) <= len(segment):
+        segment = cls(result.pop().dentries + segment.dentries)
+      result.append(segment)
+    return tuple(result)
+
+
+class SegmentedIndex(object):
+  """Matches paths against a sequence of DentrySegment, later segments
+     first, as a single PrefixTrie over all of their dentries would"""
+
+  def __init__(self, segments):
+    self._segments = segments
+
+  def matches(self, path):
+    """List[Dentry] whose prefixes match `path`, in lookup order"""
+    found = []
+    for segment in reversed(self._segments):
+      found.extend(segment.index.matches(path))
+    return found
+
+  def matches_many(self, paths):
+    """List[List[Dentry]], the matches of each of `paths` in order"""
+    if len(self._segments) == 1:
+      return self._segments[0].index.matches_many(paths)
+    results = [[] for _ in paths]
+    for segment in reversed(self._segments):
+      for found, matches in zip(results, segment.index.matches_many(paths)):
+        found.extend(matches)
+    return results
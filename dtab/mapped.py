@@ -0,0 +1,106 @@
+from dtab.codec import BinaryDtab
+from dtab.dtab import Dtab
+from dtab.error import IllegalArgumentException
+from dtab.index import DentrySegment
+import mmap
+
+
+class MappedIndex(object):
+  """Matches paths against the lookup index of a MappedDtab, with the
+     interface of dtab.index.SegmentedIndex"""
+
+  def __init__(self, dtab):
+    self._dtab = dtab
+
+  def matches(self, path):
+    """List[Dentry] whose prefixes match `path`, in lookup order"""
+    return [self._dtab.dentry(i) for i in self._dtab.encoded.matches(path)]
+
+  def matches_many(self, paths):
+    """List[List[Dentry]], the matches of each of `paths` in order"""
+    return [self.matches(path) for path in paths]
+
+
+class MappedDtab(Dtab):
+  """A read-only Dtab over a buffer written by MappedDtab.write, or
+     Dtab.to_bytes(index=True), typically a memory-mapped file.
+
+     Dentries and the prefix trie of `lookup` are read from the buffer
+     in place, see dtab.codec.BinaryDtab, and a Dentry is only decoded
+     once it matches a lookup or is accessed.  Processes that map the
+     same file, or the buf of the same multiprocessing.shared_memory
+     segment, share one physical copy of the table, so a large
+     Dtab.base opened before forking workers is not copied into each
+     of them.
+
+     Concatenating or copying a MappedDtab gives a plain Dtab.
+  """
+
+  @classmethod
+  def write(cls, dtab, filename):
+    """Write `dtab` with its lookup index to `filename`"""
+    with open(filename, 'wb') as f:
+      f.write(dtab.to_bytes(index=True))
+
+  @classmethod
+  def open(cls, filename):
+    """A MappedDtab over a read-only memory map of `filename`"""
+    with open(filename, 'rb') as f:
+      buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+      instance = cls(buf)
+    except Exception:
+      buf.close()
+      raise
+    instance._mmap = buf
+    return instance
+
+  @classmethod
+  def from_segments(cls, segments):
+    return Dtab.from_segments(segments)
+
+  def __init__(self, buf):
+    self._encoded = BinaryDtab(buf)
+    if not self._encoded.indexed:
+      raise IllegalArgumentException("encoded dtab has no lookup index")
+    self._mmap = None
+    self._length = self._encoded.length
+    self._decoded = {}
+    self._dentries = None
+    self._segments = None
+    self._index = MappedIndex(self)
+    self._compiled = None
+    self._lookup_cache = None
+
+  @property
+  def encoded(self):
+    """The dtab.codec.BinaryDtab this view reads"""
+    return self._encoded
+
+  def dentry(self, index):
+    """Dentry `index`, decoded on first access"""
+    dentry = self._decoded.get(index)
+    if dentry is None:
+      dentry = self._decoded[index] = self._encoded.dentry(index)
+    return dentry
+
+  @property
+  def dentries(self):
+    """Tuple[Dentry], all decoded on first access"""
+    if self._dentries is None:
+      self._dentries = tuple(self.dentry(i) for i in range(self._length))
+    return self._dentries
+
+  @property
+  def segments(self):
+    if self._segments is None:
+      self._segments = (DentrySegment(self.dentries),)
+    return self._segments
+
+  def close(self):
+    """Release the buffer, and the memory map if opened by `open`.
+       Dentries decoded so far stay usable"""
+    self._encoded.buffer.release()
+    if self._mmap is not None:
+      self._mmap.close()
+      self._mmap = None
@@ -1,17 +1,111 @@
 from dtab.path import Path
 
 
-class Address(object):
+class AddressBase(type):
 
   @property
-  def pending(self):
-    raise NotImplementedError()
+  def pending(cls):
+    """The addresses are not known yet"""
+    if not hasattr(cls, '_pending'):
+      cls._pending = cls(cls.PENDING)
+    return cls._pending
+
+  @property
+  def neg(cls):
+    """The name is known to have no addresses"""
+    if not hasattr(cls, '_neg'):
+      cls._neg = cls(cls.NEG)
+    return cls._neg
+
+
+class Address(AddressBase('AddressBase', (object,), {})):
+  """The addresses a name is bound to, Finagle's Addr: pending, bound to
+     a set of (host, port) pairs, negative, or failed with a reason."""
+  PENDING = 'pending'
+  BOUND = 'bound'
+  NEG = 'neg'
+  FAILED = 'failed'
+
+  @classmethod
+  def bound(cls, *addresses):
+    return cls(cls.BOUND, addresses=addresses)
+
+  @classmethod
+  def failed(cls, reason):
+    return cls(cls.FAILED, reason=reason)
+
+  def __init__(self, state, addresses=(), reason=None):
+    self._state = state
+    self._addresses = frozenset(addresses)
+    self._reason = reason
+
+  @property
+  def state(self):
+    return self._state
+
+  @property
+  def addresses(self):
+    """frozenset of (host, port) of a bound Address"""
+    return self._addresses
+
+  @property
+  def reason(self):
+    return self._reason
+
+  def __eq__(self, other):
+    if self is other:
+      return True
+    return (isinstance(other, Address) and self.state == other.state and
+            self.addresses == other.addresses and self.reason == other.reason)
+
+  def __ne__(self, other):
+    return not self.__eq__(other)
+
+  def __hash__(self):
+    return hash((self.state, self.addresses))
+
+  @property
+  def show(self):
+    if self.state == self.BOUND:
+      return "Bound({})".format(",".join(
+          "{}:{}".format(host, port) for host, port in sorted(self.addresses)))
+    if self.state == self.FAILED:
+      return "Failed({})".format(self.reason)
+    return self.state.capitalize()
+
+  def __str__(self):
+    return "Address({})".format(self.show)
 
 
 class Bound(object):
+  """A name bound by a namer to an `address`.  `id` identifies the bound
+     name, usually the namer path that bound it, and `path` is the
+     residual path that the namer did not consume."""
 
-  def __init__(self, address):
+  def __init__(self, address, id=None, path=None):
     self.address = address
+    self.id = id
+    self.path = Path.empty if path is None else path
+
+  def __eq__(self, other):
+    if self is other:
+      return True
+    return (isinstance(other, Bound) and self.id == other.id and self.path == other.path and
+            self.address == other.address)
+
+  def __ne__(self, other):
+    return not self.__eq__(other)
+
+  def __hash__(self):
+    return hash((self.id, self.path))
+
+  @property
+  def show(self):
+    return "Bound({},{},{})".format(self.address.show, getattr(self.id, 'show', self.id),
+                                    self.path.show)
+
+  def __str__(self):
+    return self.show
 
 
 class NameBase(type):
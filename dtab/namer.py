@@ -0,0 +1,176 @@
+from dtab.cache import LRUCache
+from dtab.dtab import Dtab
+from dtab.error import IllegalArgumentException
+from dtab.name import Address, Bound
+from dtab.path import Path
+from dtab.tree import NameTree
+import asyncio
+import socket
+import time
+
+
+class Namer(object):
+  """Binds the paths under `/$/<name>` of a NamerRegistry.
+
+     `lookup` is a coroutine given the path after `/$/<name>` and
+     returning a NameTree with dtab.name.Bound leaves, NameTree.Neg when
+     the namer does not know the path, or NameTree.Fail.  Results are
+     cached for `ttl` seconds.
+  """
+  ttl = 60.0
+
+  async def lookup(self, path):
+    raise NotImplementedError()
+
+
+class InetNamer(Namer):
+  """Binds /$/inet/<host>/<port>[/<residual>] to the addresses of
+     `host`, resolved with the event loop's getaddrinfo unless `resolve`
+     is false.  Unresolvable hosts bind to a failed Address."""
+  ttl = 30.0
+
+  def __init__(self, resolve=True):
+    self._resolve = resolve
+
+  async def lookup(self, path):
+    elems = path.elems
+    if len(elems) < 2 or not elems[1].isdigit():
+      return NameTree.Neg
+    host, port = elems[0], int(elems[1])
+    if not self._resolve:
+      address = Address.bound((host, port))
+    else:
+      try:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+      except socket.gaierror as e:
+        address = Address.failed(e)
+      else:
+        address = Address.bound(*[info[4][:2] for info in infos])
+    return NameTree.Leaf(Bound(
+        address, id=Path.from_tuple(('$', 'inet') + elems[:2]), path=Path.from_tuple(elems[2:])))
+
+
+class FailNamer(Namer):
+  """Binds /$/fail to NameTree.Fail"""
+  ttl = float('inf')
+
+  async def lookup(self, path):
+    return NameTree.Fail
+
+
+class NilNamer(Namer):
+  """Binds /$/nil to NameTree.Empty"""
+  ttl = float('inf')
+
+  async def lookup(self, path):
+    return NameTree.Empty
+
+
+class NamerRegistryBase(type):
+
+  @property
+  def default(cls):
+    """The registry of the built-in namers: inet, fail and nil"""
+    if not hasattr(cls, '_default'):
+      cls._default = cls({'inet': InetNamer(), 'fail': FailNamer(), 'nil': NilNamer()})
+    return cls._default
+
+
+class NamerRegistry(NamerRegistryBase('NamerRegistryBase', (object,), {})):
+  """Binds the namer paths `/$/<name>/...` that dtab.dtab.Dtab.bind
+     leaves with the Namer registered as `name`.
+
+     The leaves of a tree are looked up concurrently.  Each result is
+     cached in an LRUCache of `maxsize` entries for the `ttl` of its
+     namer, and concurrent lookups of one path share a single call of
+     its namer.  Paths of unknown namers bind to NameTree.Fail.
+  """
+
+  def __init__(self, namers=None, maxsize=1024, clock=time.monotonic):
+    self._namers = dict(namers or {})
+    self._cache = LRUCache(maxsize)
+    self._inflight = {}
+    self._clock = clock
+
+  @property
+  def cache(self):
+    return self._cache
+
+  def register(self, name, namer):
+    """Bind `/$/<name>` with `namer` from now on"""
+    self._namers[name] = namer
+    self._cache.clear()
+
+  def unregister(self, name):
+    self._namers.pop(name, None)
+    self._cache.clear()
+
+  def get(self, name):
+    return self._namers.get(name)
+
+  async def lookup(self, path):
+    """The NameTree bound to the namer path `path`"""
+    elems = path.elems
+    if len(elems) < 2 or elems[0] != '$':
+      raise IllegalArgumentException("{} is not a namer path".format(path.show))
+    namer = self._namers.get(elems[1])
+    if namer is None:
+      return NameTree.Fail
+
+    cached = self._cache.get(path)
+    if cached is not None and cached[0] > self._clock():
+      return cached[1]
+    task = self._inflight.get(path)
+    if task is None:
+      task = self._inflight[path] = asyncio.ensure_future(namer.lookup(Path.from_tuple(elems[2:])))
+      task.add_done_callback(lambda done: self._finish(path, namer, done))
+    # a cancelled caller must not cancel the lookup the others wait for
+    return await asyncio.shield(task)
+
+  def _finish(self, path, namer, task):
+    del self._inflight[path]
+    if not task.cancelled() and task.exception() is None:
+      self._cache.put(path, (self._clock() + namer.ttl, task.result()))
+
+  async def bind(self, tree):
+    """`tree` with each namer path leaf replaced by the tree its namer
+       binds it to, simplified: an Alt falls back past the leaves its
+       namers bind to NameTree.Neg"""
+    paths = []
+    self._collect(tree, paths)
+    paths = list(set(paths))
+    bound = dict(zip(paths, await asyncio.gather(*[self.lookup(p) for p in paths])))
+    return self._replace(tree, bound).simplified
+
+  @classmethod
+  def _collect(cls, tree, paths):
+    if isinstance(tree, NameTree.Leaf):
+      if isinstance(tree.value, Path) and tree.value.elems[:1] == ('$',):
+        paths.append(tree.value)
+    elif isinstance(tree, (NameTree.Alt, NameTree.Union)):
+      for t in tree:
+        cls._collect(t, paths)
+    elif isinstance(tree, NameTree.Weighted):
+      cls._collect(tree.tree, paths)
+
+  @classmethod
+  def _replace(cls, tree, bound):
+    if isinstance(tree, NameTree.Leaf):
+      return bound.get(tree.value, tree)
+    if isinstance(tree, NameTree.Alt):
+      return NameTree.Alt(*[cls._replace(t, bound) for t in tree])
+    if isinstance(tree, NameTree.Union):
+      return NameTree.Union(*[cls._replace(t, bound) for t in tree])
+    if isinstance(tree, NameTree.Weighted):
+      return NameTree.Weighted(tree.weight, cls._replace(tree.tree, bound))
+    return tree
+
+  async def resolve(self, path, dtab=None):
+    """Bind `path` through `dtab`, Dtab.base by default, and then its
+       namer paths"""
+    dtab = Dtab.base if dtab is None else dtab
+    return await self.bind(dtab.bind(path))
+
+  async def resolve_many(self, paths, dtab=None):
+    """List of the `resolve` of each of `paths`, resolved concurrently"""
+    return list(await asyncio.gather(*[self.resolve(path, dtab) for path in paths]))
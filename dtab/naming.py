@@ -0,0 +1,99 @@
+from dtab.error import IllegalArgumentException
+from dtab.tree import NameTree
+
+
+class DefaultInterpreter(object):
+  """Binds a dtab.path.Path through a dtab.dtab.Dtab.
+
+     Leaves of the looked up tree are looked up again, recursively, until
+     they are namer paths (`/$/...`) or have no match (NameTree.Neg).
+     The result is the simplified tree of namer path leaves.
+
+     An Alt is bound branch by branch, and the branches after one that
+     binds to NameTree.Fail or NameTree.Empty are never bound.  Any other
+     branch is kept together with the ones after it, because the namers
+     its leaves end in may still bind them to NameTree.Neg, see
+     dtab.namer.NamerRegistry.bind.
+
+     Within one `bind`, each path is bound once and shared between the
+     branches that reach it.  A path that is reached again while it is
+     still being bound, or a rewrite chain deeper than `max_depth`,
+     raises IllegalArgumentException instead of recursing forever.  In
+     a branch of an Alt that comes after branches that were kept, it
+     ends the Alt with NameTree.Fail instead, as the branch would only
+     be reached if all of those go Neg.
+  """
+  max_depth = 100
+
+  def __init__(self, dtab, max_depth=None):
+    self._dtab = dtab
+    if max_depth is not None:
+      self.max_depth = max_depth
+
+  @property
+  def dtab(self):
+    return self._dtab
+
+  def bind(self, path):
+    """The fully bound NameTree of `path`"""
+    return self.bind_path(path, 0, [], {}, set())
+
+  def bind_path(self, path, depth, stack, memo, tainted):
+    if path.elems[:1] == ('$',):
+      return NameTree.Leaf(path)
+    bound = memo.get(path)
+    if bound is not None:
+      return bound
+    if path in stack:
+      cycle = [p.show for p in stack[stack.index(path):]] + [path.show]
+      raise IllegalArgumentException("Cycle detected binding {}: {}".format(
+          path.show, " -> ".join(cycle)))
+    if depth > self.max_depth:
+      raise IllegalArgumentException("Max recursion level reached.")
+
+    stack.append(path)
+    try:
+      bound = self.bind_tree(self._dtab.lookup(path), depth + 1, stack, memo, tainted).simplified
+    finally:
+      stack.pop()
+    # a tree with an error turned into Fail depends on the paths that
+    # were being bound, so it is not shared with other branches
+    if path not in tainted:
+      memo[path] = bound
+    return bound
+
+  def bind_tree(self, tree, depth, stack, memo, tainted):
+    if isinstance(tree, NameTree.Leaf):
+      return self.bind_path(tree.value, depth, stack, memo, tainted)
+    if isinstance(tree, NameTree.Alt):
+      kept = []
+      for t in tree:
+        if t is NameTree.Neg:
+          continue
+        try:
+          bound = self.bind_tree(t, depth, stack, memo, tainted).simplified
+        except IllegalArgumentException:
+          if not kept:
+            raise
+          tainted.update(stack)
+          bound = NameTree.Fail
+        if bound is NameTree.Neg:
+          continue
+        kept.append(bound)
+        if self.settled(bound):
+          break
+      return NameTree.Alt(*kept).simplified
+    if isinstance(tree, NameTree.Union):
+      return NameTree.Union(*[self.bind_tree(t, depth, stack, memo, tainted) for t in tree])
+    if isinstance(tree, NameTree.Weighted):
+      return NameTree.Weighted(tree.weight, self.bind_tree(tree.tree, depth, stack, memo, tainted))
+    return tree
+
+  @staticmethod
+  def settled(tree):
+    """Whether no branch of an Alt after the simplified `tree` can be
+       reached: it is Fail or Empty, or an Alt holding either"""
+    if tree is NameTree.Fail or tree is NameTree.Empty:
+      return True
+    return isinstance(tree, NameTree.Alt) and any(
+        t is NameTree.Fail or t is NameTree.Empty for t in tree)
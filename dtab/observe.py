@@ -0,0 +1,137 @@
+from dtab.dtab import Dtab
+from dtab.error import IllegalArgumentException
+from dtab.index import PrefixTrie
+from dtab.naming import DefaultInterpreter
+from threading import RLock
+
+
+class TracingInterpreter(DefaultInterpreter):
+  """A DefaultInterpreter that records every path it looks up in the
+     dtab, whether binding succeeds or not"""
+
+  def __init__(self, dtab, max_depth=None):
+    super(TracingInterpreter, self).__init__(dtab, max_depth)
+    self.looked_up = set()
+
+  def bind_path(self, path, depth, stack, memo, tainted):
+    if path.elems[:1] != ('$',):
+      self.looked_up.add(path)
+    return super(TracingInterpreter, self).bind_path(path, depth, stack, memo, tainted)
+
+
+def changed_dentries(old, new):
+  """List of the dentries added, removed or moved from Dtab `old` to Dtab
+     `new`, the only ones whose lookups can differ, see Dtab.diff"""
+  return old.diff(new).changed
+
+
+class Subscription(object):
+  """A path observed through ObservableBindings.  `tree` is its last
+     bound NameTree, or `error` the IllegalArgumentException binding it
+     raised"""
+
+  def __init__(self, bindings, path, callback, on_error):
+    self._bindings = bindings
+    self.path = path
+    self.callback = callback
+    self.on_error = on_error
+    self.tree = None
+    self.error = None
+    self.dependencies = frozenset()
+
+  def cancel(self):
+    self._bindings.unsubscribe(self)
+
+
+class ObservableBindings(object):
+  """Binds subscribed paths through a Dtab and calls back when their
+     bound NameTree changes.
+
+     Binding a path records the paths looked up along the way.  When
+     the dtab is updated, only the dentries added, removed or moved
+     according to Dtab.diff can change a lookup, so only the
+     subscriptions that looked up a path matched by one of their
+     prefixes are bound again, and only those whose tree changed are
+     called back.
+
+     Without a `dtab`, the bindings follow Dtab.base, updating on each
+     assignment to it until `close`.
+  """
+
+  def __init__(self, dtab=None, max_depth=None):
+    self._lock = RLock()
+    self._max_depth = max_depth
+    self._follows_base = dtab is None
+    self._dtab = Dtab.base if dtab is None else dtab
+    self._subscriptions = set()
+    self._dependents = {}
+    self.rebinds = 0
+    if self._follows_base:
+      Dtab.watch_base(self.update)
+
+  @property
+  def dtab(self):
+    return self._dtab
+
+  def close(self):
+    """Stop following Dtab.base"""
+    if self._follows_base:
+      Dtab.unwatch_base(self.update)
+      self._follows_base = False
+
+  def subscribe(self, path, callback, on_error=None):
+    """Observe `path`: `callback(tree)` is called with its bound tree now
+       and whenever it changes, `on_error(exception)` when binding it
+       fails.  Returns the Subscription"""
+    with self._lock:
+      subscription = Subscription(self, path, callback, on_error)
+      self._subscriptions.add(subscription)
+      self._bind(subscription)
+      return subscription
+
+  def unsubscribe(self, subscription):
+    with self._lock:
+      self._subscriptions.discard(subscription)
+      self._track(subscription, frozenset())
+
+  def update(self, dtab):
+    """Bind again, through `dtab`, the subscriptions it can affect"""
+    with self._lock:
+      changed = changed_dentries(self._dtab, dtab)
+      self._dtab = dtab
+      if not changed:
+        return
+      index = PrefixTrie(changed)
+      affected = set()
+      for path, subscriptions in self._dependents.items():
+        if index.matches(path):
+          affected.update(subscriptions)
+      for subscription in affected:
+        self._bind(subscription)
+
+  def _bind(self, subscription):
+    self.rebinds += 1
+    interpreter = TracingInterpreter(self._dtab, self._max_depth)
+    try:
+      tree, error = interpreter.bind(subscription.path), None
+    except IllegalArgumentException as e:
+      tree, error = None, e
+    self._track(subscription, frozenset(interpreter.looked_up))
+
+    if error is not None:
+      subscription.tree, subscription.error = None, error
+      if subscription.on_error is not None:
+        subscription.on_error(error)
+    elif subscription.error is not None or subscription.tree != tree:
+      subscription.tree, subscription.error = tree, None
+      subscription.callback(tree)
+
+  def _track(self, subscription, dependencies):
+    for path in subscription.dependencies - dependencies:
+      dependents = self._dependents[path]
+      dependents.discard(subscription)
+      if not dependents:
+        del self._dependents[path]
+    for path in dependencies - subscription.dependencies:
+      self._dependents.setdefault(path, set()).add(subscription)
+    subscription.dependencies = dependencies
@@ -3,6 +3,9 @@ from dtab.path import Path
 from dtab.tree import NameTree
 from dtab.util import u
 from io import BytesIO
+import codecs
+import functools
+import re
 import string
 
 EOI = 2**8 - 1
@@ -10,6 +13,47 @@ FORWARD_SLASH = 92
 WHITESPACE = list(map(ord, string.whitespace))
 WILDCARD = 42
 
+# character class tables and token patterns for FastNameTreeParsers
+SKIPPABLE_CHARS = frozenset(string.whitespace + '#')
+LABEL_CHARS = frozenset(Path.showable_chars + chr(FORWARD_SLASH))
+PREFIX_ELEM_CHARS = LABEL_CHARS | frozenset(chr(WILDCARD))
+NUMBER_CHARS = frozenset(string.digits + '.')
+SKIP_RE = re.compile(r'(?:[{}]+|#[^\n]*\n?)*'.format(re.escape(string.whitespace)))
+LABEL_RE = re.compile(r'(?:[{}]|\\x[0-9a-fA-F]{{2}})+'.format(
+    re.escape(Path.showable_chars)))
+ESCAPE_RE = re.compile(r'\\x([0-9a-fA-F]{2})')
+NUMBER_RE = re.compile(r'[0-9.]*')
+# tokens of scan_dentries: a `#` is only a comment outside of labels
+DENTRY_TOKEN_RE = re.compile(
+    r'(?P<skip>[{ws}]+|#[^\n]*)|(?P<semi>;)|/(?:\*|(?:[{label}]|\\.?)*)|[^;/#{ws}]+'.format(
+        ws=re.escape(string.whitespace), label=re.escape(Path.showable_chars)))
+
+
+def scan_dentries(str_input):
+  """Find the `;` separated dentries of a dtab without parsing them.
+
+     Returns List[(start, end, stop)], one per separated chunk, where
+     `str_input[start:end]` is the chunk without surrounding whitespace
+     and comments (empty if there is nothing else) and `stop` is the
+     index of the terminating `;`, or the length of the input.
+  """
+  spans = []
+  start = end = None
+  for match in DENTRY_TOKEN_RE.finditer(str_input):
+    if match.lastgroup == 'skip':
+      continue
+    if match.lastgroup == 'semi':
+      index = match.start()
+      spans.append((index, index, index) if start is None else (start, end, index))
+      start = end = None
+      continue
+    if start is None:
+      start = match.start()
+    end = match.end()
+  size = len(str_input)
+  spans.append((size, size, size) if start is None else (start, end, size))
+  return spans
+
 
 def to_ordinal(func):
 
@@ -26,31 +70,121 @@ def to_ordinal(func):
 
 
 class NameTreeParsers(object):
+  # an optional dtab.cache.LRUCache of parse results keyed on the input
+  cache = None
+
+  @classmethod
+  def parser(cls, str_input, fast=False):
+    """A parser over `str_input`; `fast` selects FastNameTreeParsers"""
+    if fast:
+      return FastNameTreeParsers(str_input)
+    return cls(str_input)
+
+  @classmethod
+  def parsePath(cls, path, fast=False):
+    return cls.cached('path', path, lambda: cls.parser(path, fast).parse_all_path())
 
   @classmethod
-  def parsePath(cls, path):
-    return cls(path).parse_all_path()
+  def parseNameTree(cls, name, fast=False):
+    return cls.cached('tree', name, lambda: cls.parser(name, fast).parse_all_name_tree())
 
   @classmethod
-  def parseNameTree(cls, name):
-    return cls(name).parse_all_name_tree()
+  def parseDentry(cls, data, fast=False):
+    return cls.cached('dentry', data, lambda: cls.parser(data, fast).parse_all_dentry())
 
   @classmethod
-  def parseDentry(cls, data):
-    return cls(data).parse_all_dentry()
+  def parseDentryPrefix(cls, data, fast=False):
+    return cls.cached('prefix', data, lambda: cls.parser(data, fast).parse_all_dentry_prefix())
 
   @classmethod
-  def parseDentryPrefix(cls, data):
-    return cls(data).parse_all_dentry_prefix()
+  def parseDtab(cls, dtab, fast=False):
+    return cls.cached('dtab', dtab, lambda: cls.parser(dtab, fast).parse_all_dtab())
 
   @classmethod
-  def parseDtab(cls, dtab):
-    return cls(dtab).parse_all_dtab()
+  def parseLazyDtab(cls, dtab, fast=True):
+    """Parse only the dentry prefixes of `dtab`, see parse_lazy_dtab.
+       The scan is meant to be cheap, so it uses FastNameTreeParsers
+       unless `fast` is false"""
+    return cls.cached('lazy_dtab', dtab, lambda: cls.parser(dtab, fast).parse_lazy_dtab())
+
+  @classmethod
+  def iterDentries(cls, fileobj, fast=False, chunk_size=65536):
+    """Generator of the Dentry of a dtab read from the file-like
+       `fileobj` (text or UTF-8 bytes) in `chunk_size` reads.
+
+       Each Dentry is yielded as soon as its terminating `;` is read, and
+       only the text of the current dentry is held in memory.  Errors
+       raise IllegalArgumentException showing the failing dentry and
+       its line and column in the input.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    buf = u('')
+    resume = 0
+    line, column = 1, 1
+    eof = False
+    # whether the text before the next separator is more than whitespace
+    pending = False
+    while True:
+      separator = None
+      for match in DENTRY_TOKEN_RE.finditer(buf, resume):
+        if match.lastgroup == 'semi':
+          separator = match.start()
+          break
+        resume = match.start()
+        pending = pending or match.lastgroup != 'skip'
+
+      if separator is None and not eof:
+        chunk = fileobj.read(chunk_size)
+        if isinstance(chunk, bytes):
+          chunk = decoder.decode(chunk, final=not chunk)
+        eof = not chunk
+        buf += chunk
+        continue
+      if separator is not None or pending:
+        text = buf if separator is None else buf[:separator]
+        parser = cls.parser(text, fast)
+        try:
+          yield parser.parse_all_dentry()
+        except IllegalArgumentException as e:
+          consumed = text[:parser.index]
+          error_line = line + consumed.count('\n')
+          if error_line == line:
+            error_column = column + len(consumed)
+          else:
+            error_column = len(consumed) - consumed.rfind('\n')
+          raise IllegalArgumentException("{} at line {}, column {}".format(
+              e, error_line, error_column))
+      if separator is None:
+        return
+
+      consumed = buf[:separator + 1]
+      newlines = consumed.count('\n')
+      if newlines:
+        line += newlines
+        column = len(consumed) - consumed.rfind('\n')
+      else:
+        column += len(consumed)
+      buf = buf[separator + 1:]
+      resume = 0
+      pending = False
+
+  @classmethod
+  def cached(cls, kind, str_input, parse):
+    """Parse with `parse()` through `NameTreeParsers.cache` when one is set.
+
+       Parsed objects are immutable, so cached results are shared
+       between callers.
+    """
+    cache = NameTreeParsers.cache
+    if cache is None:
+      return parse()
+    return cache.get_or_load((kind, str_input), parse)
 
   def __init__(self, str_input):
     # avoiding circular dependencies
-    from dtab.dtab import Dentry, Dtab
+    from dtab.dtab import Dentry, Dtab, LazyDentry
     self._dentry_cls = Dentry
+    self._lazy_dentry_cls = LazyDentry
     self._dtab_cls = Dtab
     self._str_input = u(str_input)
     self._index = 0
@@ -138,9 +272,9 @@ class NameTreeParsers(object):
   def parse_hex_char(self):
     c = chr(self.peek)
     try:
-      int(c, 16)
+      value = int(c, 16)
       self.next()
-      return ord(c)
+      return value
     except ValueError:
       self.illegal("hex char", c)
 
@@ -154,18 +288,24 @@ class NameTreeParsers(object):
       c = self.peek
       if Path.is_showable(c):
         self.next()
-        bio.write(bytes(c))
+        bio.write(bytearray([c]))
       elif c == FORWARD_SLASH:
         self.next()
         self.eat(u('x'))
         fst = self.parse_hex_char()
         snd = self.parse_hex_char()
-        bio.write(chr(int(fst, 16) << 4 | int(snd, 16)))
+        bio.write(bytearray([fst << 4 | snd]))
       else:
         self.illegal("label char", c)
       if not self.is_label_char(self.peek):
         break
-    return bio.getvalue().decode('utf-8')
+    return self.decode_label(bio.getvalue())
+
+  def decode_label(self, data):
+    try:
+      return data.decode('utf-8')
+    except UnicodeDecodeError as e:
+      self.illegal("UTF-8 label", e.reason)
 
   @to_ordinal
   def is_dentry_prefix_elem_char(self, char):
@@ -290,6 +430,53 @@ class NameTreeParsers(object):
     tree = self.parse_tree()
     return self._dentry_cls(prefix, tree)
 
+  def parse_dentry_at(self, start, stop):
+    """Parse the dentry beginning at `start` that scan_dentries found to
+       end with the separator at `stop`"""
+    self._index = start
+    dentry = self.parse_dentry()
+    self.eat_whitespace()
+    if self.index != stop:
+      self.illegal(EOI, self.peek)
+    return dentry
+
+  def parse_tree_at(self, start, stop):
+    """Parse the tree beginning at `start` of a dentry that
+       scan_dentries found to end with the separator at `stop`"""
+    self._index = start
+    tree = self.parse_tree()
+    self.eat_whitespace()
+    if self.index != stop:
+      self.illegal(EOI, self.peek)
+    return tree
+
+  def parse_lazy_dtab(self):
+    """A Dtab of dtab.dtab.LazyDentry: dentries are found with
+       scan_dentries and only their prefixes are parsed here, each tree
+       is parsed with parse_tree_at by a parser of its own on first
+       access"""
+    if self.size == 0:
+      return self._dtab_cls.empty
+    spans = scan_dentries(self.string)
+    if any(start == end for start, end, _ in spans[:-1]):
+      # an empty dentry is an error, let the parser report it
+      return self.parse_all_dtab()
+    dentries = []
+    for start, end, stop in spans:
+      if start == end:
+        continue
+      self._index = start
+      prefix = self.parse_dentry_prefix()
+      self.eat_whitespace()
+      self.eat('=')
+      self.eat('>')
+      dentries.append(self._lazy_dentry_cls(
+          prefix, functools.partial(self._parse_tree_later, self.index, stop)))
+    return self._dtab_cls(dentries)
+
+  def _parse_tree_later(self, start, stop):
+    return self.__class__(self._str_input).parse_tree_at(start, stop)
+
   def parse_dtab(self):
     dentries = []
     while True:
@@ -324,3 +511,101 @@ class NameTreeParsers(object):
     if self.size == 0:
       return self._dtab_cls.empty
     return self.__parse_all(self.parse_dtab())
+
+
+class FastNameTreeParsers(NameTreeParsers):
+  """A NameTreeParsers that scans whole tokens with compiled patterns
+     and character class tables instead of dispatching per character.
+
+     It builds the same objects as NameTreeParsers.  Whenever a token
+     does not match its pattern, parsing of that token is handed back
+     to NameTreeParsers from the same index, so errors carry exactly
+     the same IllegalArgumentException messages.
+  """
+
+  @property
+  def peek(self):
+    if self._index >= len(self._str_input):
+      return EOI
+    return ord(self._str_input[self._index])
+
+  def peek_in(self, chars):
+    """Whether the next character is a member of the set `chars`"""
+    index = self._index
+    return index < len(self._str_input) and self._str_input[index] in chars
+
+  def maybe_eat(self, char):
+    index = self._index
+    if index < len(self._str_input) and self._str_input[index] == char:
+      self._index = index + 1
+      return True
+    return False
+
+  def eat(self, char):
+    if not self.maybe_eat(char):
+      self.illegal(ord(char), self.peek)
+
+  def eat_whitespace(self):
+    if self.peek_in(SKIPPABLE_CHARS):
+      self._index = SKIP_RE.match(self._str_input, self._index).end()
+
+  def parse_label(self):
+    match = LABEL_RE.match(self._str_input, self._index)
+    if match is None or self._str_input.startswith('\\', match.end()):
+      return NameTreeParsers.parse_label(self)
+    self._index = match.end()
+    label = match.group()
+    if '\\' not in label:
+      return label
+    parts = ESCAPE_RE.split(label)
+    bio = bytearray(parts[0].encode('ascii'))
+    for i in range(1, len(parts), 2):
+      bio.append(int(parts[i], 16))
+      bio.extend(parts[i + 1].encode('ascii'))
+    return self.decode_label(bytes(bio))
+
+  def parse_number(self):
+    start = self._index
+    end = NUMBER_RE.match(self._str_input, start).end()
+    result = self._str_input[start:end]
+    if (result.count('.') > 1 or result == '.' or
+        (end < len(self._str_input) and self._str_input[end].isdigit())):
+      return NameTreeParsers.parse_number(self)
+    self._index = end
+    return float(result)
+
+  def parse_dentry_prefix_elem(self):
+    if self.maybe_eat('*'):
+      return self._dentry_cls.Prefix.AnyElem
+    return self._dentry_cls.Prefix.Label(self.parse_label())
+
+  def parse_dentry_prefix(self):
+    self.eat_whitespace()
+    self.eat('/')
+    if not self.peek_in(PREFIX_ELEM_CHARS):
+      return self._dentry_cls.Prefix.empty
+    elems = [self.parse_dentry_prefix_elem()]
+    while self.maybe_eat('/'):
+      elems.append(self.parse_dentry_prefix_elem())
+    return self._dentry_cls.Prefix(*elems)
+
+  def parse_path(self):
+    self.eat_whitespace()
+    self.eat('/')
+    if not self.peek_in(LABEL_CHARS):
+      return Path.empty
+    labels = [self.parse_label()]
+    while self.maybe_eat('/'):
+      labels.append(self.parse_label())
+    return Path(*labels)
+
+  def parse_weighted(self):
+    self.eat_whitespace()
+    if self.peek_in(NUMBER_CHARS) or chr(self.peek).isdigit():
+      weight = self.parse_number()
+      self.eat_whitespace()
+      self.eat('*')
+      self.eat_whitespace()
+    else:
+      weight = NameTree.Weighted.defaultWeight
+    return NameTree.Weighted(weight, self.parse_simple())
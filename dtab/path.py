@@ -1,5 +1,6 @@
 from dtab.tree import Leaf
 from dtab.util import u
+from six.moves import intern
 
 
 class PathBase(type):
@@ -19,61 +20,120 @@ class PathBase(type):
     return 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_:.#$%-'
 
 
-class Path(PathBase('PathBase', (object,), {})):
+class Path(PathBase('PathBase', (object,), {'__slots__': ()})):
+  """An immutable sequence of path elements.
+
+     Paths compare and hash by their elements, so they can be used as
+     dict keys.  Setting `Path.intern_elems` interns every element
+     string, so that many paths sharing the same labels share memory.
+  """
+  __slots__ = ('_elems', '_hash', '_show', '_parts')
+  intern_elems = False
 
   @classmethod
   def Utf8(cls, *elems):
     return cls(*[u(elem) for elem in elems])
 
+  @classmethod
+  def from_tuple(cls, elems):
+    """A Path over `elems`, a tuple of element strings, without copying
+       or flattening it"""
+    if cls.intern_elems:
+      return cls(*elems)
+    path = cls.__new__(cls)
+    path._elems = elems
+    path._hash = None
+    path._show = None
+    path._parts = None
+    return path
+
   def __init__(self, *elems):
-    self._elems = []
+    collected = []
     for e in elems:
-      self.append(e)
+      self.__class__._collect(collected, e)
+    if self.__class__.intern_elems:
+      collected = [intern(e) if type(e) is str else e for e in collected]
+    self._elems = tuple(collected)
+    self._hash = None
+    self._show = None
+    self._parts = None
 
-  def append(self, value):
+  @classmethod
+  def _collect(cls, collected, value):
     if isinstance(value, Path):
-      self._elems.extend(value.elems)
+      collected.extend(value.elems)
     elif isinstance(value, Leaf):
-      self.append(value.value)
+      cls._collect(collected, value.value)
     else:
-      self._elems.append(value)
+      collected.append(value)
+
+  def append(self, value):
+    """A new Path with `value` (an element, Path or Leaf) appended"""
+    return self.__class__(self, value)
+
+  def concat(self, elems, start=0):
+    """A Path of this path's elements followed by `elems[start:]`, a
+       tuple of element strings, in O(1): it shares this path and
+       `elems`, and its own elements are only built once needed"""
+    if start >= len(elems):
+      return self
+    path = self.__class__.__new__(self.__class__)
+    path._elems = None
+    path._hash = None
+    path._show = None
+    path._parts = (self, elems, start)
+    return path
 
   @property
   def elems(self):
+    if self._elems is None:
+      head, tail, start = self._parts
+      self._elems = head.elems + tail[start:]
     return self._elems
 
   def startswith(self, other):
-    return self.show.startswith(other.show)
+    return self.elems[:len(other.elems)] == tuple(other.elems)
 
   @property
   def size(self):
-    return len(self.elems)
+    if self._elems is None:
+      head, tail, start = self._parts
+      return head.size + len(tail) - start
+    return len(self._elems)
 
   @property
   def is_empty(self):
-    return self.size == 0
+    return not self.size
 
   @property
   def show(self):
-    return "" if self.is_empty else "/" + "/".join(self.elems)
+    if self._show is None:
+      self._show = "" if self.is_empty else "/" + "/".join(self.elems)
+    return self._show
 
   def __eq__(self, other):
-    return str(self) == str(other)
+    if self is other:
+      return True
+    return isinstance(other, Path) and self.elems == other.elems
 
   def __ne__(self, other):
     return not self.__eq__(other)
 
+  def __hash__(self):
+    if self._hash is None:
+      self._hash = hash(self.elems)
+    return self._hash
+
   def __str__(self):
     return "Path({})".format(self.show)
 
   def __add__(self, other):
     if isinstance(other, self.__class__):
-      args = self.elems + other.elems
-      return self.__class__(*args)
+      return self.concat(other.elems)
     if isinstance(other, (list, tuple)):
-      args = self.elems + list(other)
+      args = self.elems + tuple(other)
       return self.__class__.Utf8(*args)
-    return object.__add__(self, other)
+    return NotImplemented
 
   @classmethod
   def is_showable(cls, char):
@@ -0,0 +1,84 @@
+from dtab.tree import NameTree
+import random
+
+
+class AliasTable(object):
+  """Walker's alias method: picks index `i` with probability
+     proportional to `weights[i]` in O(1), after an O(n) build."""
+
+  def __init__(self, weights):
+    weights = [float(w) for w in weights]
+    total = sum(weights)
+    if not weights or total <= 0:
+      raise ValueError("weights must contain a positive weight: {}".format(weights))
+    size = len(weights)
+    scaled = [w * size / total for w in weights]
+    self._prob = [1.0] * size
+    self._alias = list(range(size))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+      small_index, large_index = small.pop(), large.pop()
+      self._prob[small_index] = scaled[small_index]
+      self._alias[small_index] = large_index
+      scaled[large_index] -= 1.0 - scaled[small_index]
+      (small if scaled[large_index] < 1.0 else large).append(large_index)
+    # what is left over is 1.0 up to rounding error
+    for i in small + large:
+      self._prob[i] = 1.0
+
+  def __len__(self):
+    return len(self._prob)
+
+  def pick(self, rng):
+    """An index drawn with one call to `rng.random()`"""
+    size = len(self._prob)
+    u = rng.random() * size
+    i = min(int(u), size - 1)
+    return i if u - i < self._prob[i] else self._alias[i]
+
+
+class UnionSampler(object):
+  """Picks branches of a bound NameTree.Union in proportion to their
+     weights, in O(1) per pick through a cached AliasTable.
+
+     Zero-weight branches are never picked.  Any other NameTree is its
+     own single branch.  `update` with a new tree rebuilds the table,
+     and `rng` (anything with a `random()` method) can be injected for
+     deterministic picks.
+  """
+
+  def __init__(self, tree, rng=None):
+    self._rng = rng if rng is not None else random.Random()
+    self._tree = None
+    self.update(tree)
+
+  @property
+  def tree(self):
+    return self._tree
+
+  @property
+  def table(self):
+    return self._table
+
+  def update(self, tree):
+    """Use `tree` from now on; the table is rebuilt only if it changed"""
+    if self._tree is not None and tree == self._tree:
+      return
+    if isinstance(tree, NameTree.Union):
+      branches = [(w.weight, w.tree) for w in tree if w.weight > 0]
+    else:
+      branches = [(NameTree.Weighted.defaultWeight, tree)]
+    if not branches:
+      raise ValueError("{} has no branch with a positive weight".format(tree))
+    self._table = AliasTable([weight for weight, _ in branches])
+    self._branches = [branch for _, branch in branches]
+    self._tree = tree
+
+  def pick(self):
+    return self._branches[self._table.pick(self._rng)]
+
+  def sample(self, k):
+    """List of `k` independent picks"""
+    branches, pick, rng = self._branches, self._table.pick, self._rng
+    return [branches[pick(rng)] for _ in range(k)]
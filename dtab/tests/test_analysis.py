@@ -0,0 +1,68 @@
+from dtab.analysis import never_neg
+from dtab.dtab import Dtab
+from dtab.namer import InetNamer, NamerRegistry
+from dtab.path import Path
+from dtab.tree import NameTree
+from unittest import TestCase
+import asyncio
+
+
+class DeadDentryTest(TestCase):
+
+  DTAB = Dtab.read("""
+    /s/web => /srv/web;
+    /s/web/admin => ~;
+    /s/*/api => /srv/api;
+    /s/db => /srv/db;
+    /s => /$/inet/gateway/80 | /srv/gateway;
+    /s/web/v2 => /srv/web2;
+    /*/web => !;
+    /srv => /$/inet/backend/80
+  """)
+
+  def test_dead_dentries(self):
+    dead = self.DTAB.dead_dentries()
+    self.assertTrue([(d.index, d.reason, d.shadowed_by) for d in dead] == [
+        (0, "shadowed", 4),
+        (1, "shadowed", 4),
+        (2, "shadowed", 4),
+        (3, "shadowed", 4),
+        (5, "shadowed", 6),
+    ])
+    self.assertTrue(Dtab.read("/a => ~; /b => /c | ~").dead_dentries()[0].reason == "neg")
+    # a later dentry only shadows the prefixes it covers
+    self.assertTrue(Dtab.read("/a/b => /x; /a/b/* => /$/nil; /*/c => !").dead_dentries() == [])
+
+  def test_pruned(self):
+    pruned = self.DTAB.pruned()
+    self.assertTrue(pruned == Dtab.read("""
+      /s => /$/inet/gateway/80 | /srv/gateway;
+      /*/web => !;
+      /srv => /$/inet/backend/80
+    """))
+    self.assertTrue(pruned.pruned() is pruned)
+    self.assertTrue(pruned.bind(Path.read("/s/db")) == NameTree.read("/$/inet/gateway/80/db | /$/inet/backend/80/gateway/db"))
+
+  def test_never_neg(self):
+    for show, expected in [("!", True), ("$", True), ("~", False), ("/$/nil", True),
+                           ("/srv", False), ("/srv | /$/nil", True), ("0 * /$/nil & /srv", False),
+                           ("1 * /$/nil & /srv", True), ("/$/fail/x", True), ("/$/inet/h/80", True),
+                           ("/$/inet/h", False), ("/$/inet/h/http", False), ("/$/custom/x", False)]:
+      self.assertTrue(never_neg(NameTree.read(show)) is expected)
+
+  def test_pruned_resolves_the_same(self):
+    dtab = Dtab.read("/s/web => /srv/web; /srv => /$/inet/backend/80; /s => /$/inet/gw")
+    self.assertTrue(dtab.pruned() is dtab)
+    registry = NamerRegistry({'inet': InetNamer(resolve=False)})
+    for d in (self.DTAB, dtab):
+      for show in ("/s/web", "/s/db", "/s/x/api"):
+        resolved = []
+        for pruned in (d, d.pruned()):
+          loop = asyncio.new_event_loop()
+          try:
+            resolved.append(loop.run_until_complete(registry.resolve(Path.read(show), pruned)))
+          finally:
+            loop.close()
+        # the branch a resolved Alt selects, the first: none of them is Neg
+        selected = [t.trees[0] if isinstance(t, NameTree.Alt) else t for t in resolved]
+        self.assertTrue(selected[0] == selected[1])
@@ -0,0 +1,51 @@
+from dtab.bulk import read_all, read_files
+from dtab.dtab import Dtab
+from unittest import TestCase
+import os
+import tempfile
+
+
+class BulkReadTest(TestCase):
+
+  SOURCES = {
+      'prod': "/s => /srv/prod; /srv => /$/inet/prod/80",
+      'staging': "/s => /srv/staging | /srv/prod",
+      'broken': "/s => /srv &",
+      'empty': "",
+      'utf8': "/s => /srv/\\xff",
+  }
+
+  def assert_results(self, results):
+    by_key = dict((r.key, r) for r in results)
+    for key in ['prod', 'staging', 'empty']:
+      self.assertTrue(by_key[key].ok and by_key[key].dtab == Dtab.read(self.SOURCES[key]))
+    self.assertTrue(not by_key['broken'].ok and by_key['broken'].dtab is None)
+    self.assertTrue(by_key['broken'].error.startswith("simple expected"))
+    self.assertTrue(not by_key['utf8'].ok and by_key['utf8'].error.startswith("UTF-8 label expected"))
+
+  def test_read_all(self):
+    self.assert_results(read_all(self.SOURCES, workers=1))
+    results = read_all(list(self.SOURCES.values()) * 3, workers=2, chunksize=2)
+    self.assertTrue([r.key for r in results] == list(range(15)))
+    self.assertTrue(results[0].binary.to_dtab() == results[0].dtab == Dtab.read(self.SOURCES['prod']))
+    self.assertTrue(Dtab.from_bytes(read_all(self.SOURCES, workers=1)[0].data) == results[0].dtab)
+    self.assertTrue([r.ok for r in results] == [r.ok for r in read_all(self.SOURCES.values())] * 3)
+
+  def test_read_files(self):
+    directory = tempfile.mkdtemp()
+    filenames = []
+    for key, text in self.SOURCES.items():
+      filenames.append(os.path.join(directory, key))
+      with open(filenames[-1], 'w') as f:
+        f.write(text)
+    try:
+      results = read_files(filenames + [os.path.join(directory, 'missing')], workers=2)
+      self.assertTrue([r.key for r in results[:-1]] == filenames)
+      for r in results[:-1]:
+        r.key = os.path.basename(r.key)
+      self.assert_results(results[:-1])
+      self.assertTrue(results[-1].error.startswith("FileNotFoundError"))
+    finally:
+      for filename in filenames:
+        os.remove(filename)
+      os.rmdir(directory)
@@ -0,0 +1,66 @@
+from dtab.cache import LRUCache
+from dtab.dtab import Dentry, Dtab
+from dtab.parser import NameTreeParsers
+from dtab.path import Path
+from unittest import TestCase
+
+
+class LRUCacheTest(TestCase):
+
+  def test_evicts_least_recently_used(self):
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    self.assertTrue(cache.get('a') == 1)
+    cache.put('c', 3)
+
+    self.assertTrue('a' in cache and 'c' in cache and 'b' not in cache)
+    self.assertTrue(cache.get('b') is None)
+    self.assertTrue(cache.stats == {
+        'hits': 1, 'misses': 1, 'evictions': 1, 'size': 2, 'maxsize': 2})
+
+
+class ParseCacheTest(TestCase):
+
+  def setUp(self):
+    NameTreeParsers.cache = LRUCache(maxsize=8)
+
+  def tearDown(self):
+    NameTreeParsers.cache = None
+
+  def test_read_is_cached(self):
+    d1 = Dtab.read("/foo=>/bar;/biz=>/baz")
+    d2 = Dtab.read("/foo=>/bar;/biz=>/baz")
+    self.assertTrue(NameTreeParsers.cache.hits == 1)
+    self.assertTrue(NameTreeParsers.cache.misses == 1)
+
+    # concatenation leaves the shared Dtab alone
+    self.assertTrue(d1 is d2)
+    d1 + Dentry.read("/a=>/b")
+    d1 + Dtab.read("/a=>/b")
+    Dtab.read("/a=>/b") + d1
+    self.assertTrue(Dtab.read("/foo=>/bar;/biz=>/baz").length == 2)
+
+    self.assertTrue(Dentry.read("/a=>/b") is Dentry.read("/a=>/b"))
+    self.assertTrue(Path.read("/a/b") is Path.read("/a/b"))
+
+  def test_lookup_cache(self):
+    shared = Dtab.read("/a => /b; /a/c => /d | /e")
+    dtab = shared.cache_lookups(maxsize=2)
+    self.assertTrue(dtab == shared and dtab.segments == shared.segments)
+    self.assertTrue(shared.lookup_cache is None and dtab.lookup_cache.maxsize == 2)
+    self.assertTrue(dtab.cache_lookups(maxsize=8).lookup_cache is not dtab.lookup_cache)
+    first = dtab.lookup(Path.read("/a/c/x"))
+    self.assertTrue(dtab.lookup(Path.Utf8("a", "c", "x")) is first)
+    self.assertTrue(dtab.lookup(Path.read("/a/c/x"), simplify=True) == first.simplified)
+    dtab.lookup(Path.read("/a"))
+    self.assertTrue(dtab.lookup_many([Path.read("/a"), Path.read("/z")]) ==
+                    [Dtab.read("/a => /b").lookup(Path.read("/a")), Dtab.empty.lookup(Path.read("/z"))])
+    stats = dtab.lookup_cache.stats
+    self.assertTrue((stats['hits'], stats['misses'], stats['evictions']) == (2, 4, 2))
+
+    # derived dtabs are new values with no cache
+    extended = dtab + Dentry.read("/a/c => /f")
+    self.assertTrue(extended.lookup_cache is None)
+    self.assertTrue(dtab.lookup(Path.read("/a/c/x")) == first)
+    self.assertTrue(extended.lookup(Path.read("/a/c/x")) != first)
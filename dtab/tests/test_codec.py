@@ -0,0 +1,50 @@
+from dtab.codec import BinaryDtab
+from dtab.dtab import Dtab
+from dtab.error import IllegalArgumentException
+from dtab.path import Path
+from unittest import TestCase
+import mmap
+import tempfile
+
+
+class BinaryDtabTest(TestCase):
+
+  DTAB = Dtab.read("""
+    / => !;
+    /#foo/*/bar => /biz | (/\\xc3\\xa9t\\xc3\\xa9 & 0.25 * /bluth) | ~ | $;
+    /svc => 3 * /$/inet/host/80 & /srv/svc;
+    /srv/svc => /$/inet/host/80
+  """)
+
+  def test_round_trip(self):
+    data = self.DTAB.to_bytes()
+    self.assertTrue(isinstance(data, bytes))
+    for buf in (data, bytearray(data), memoryview(data)):
+      dtab = Dtab.from_bytes(buf)
+      self.assertTrue(dtab == self.DTAB and dtab.show == self.DTAB.show)
+    self.assertTrue(Dtab.from_bytes(Dtab.empty.to_bytes()) == Dtab.empty)
+
+    # shared labels are stored once
+    self.assertTrue(data.count(b'host') == 1)
+
+  def test_lazy_access_from_mmap(self):
+    with tempfile.TemporaryFile() as f:
+      f.write(self.DTAB.to_bytes())
+      f.flush()
+      mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+      try:
+        encoded = BinaryDtab(mapped)
+        self.assertTrue(encoded.length == 4)
+        self.assertTrue(encoded.dentry(2) == self.DTAB.dentries[2])
+        self.assertTrue(encoded.prefix(1) == self.DTAB.dentries[1].prefix)
+        self.assertTrue(encoded.to_dtab().lookup(Path.read("/svc/a")) ==
+                        self.DTAB.lookup(Path.read("/svc/a")))
+        del encoded
+      finally:
+        mapped.close()
+
+  def test_rejects_other_input(self):
+    with self.assertRaises(IllegalArgumentException):
+      Dtab.from_bytes(b"/a=>/b;/c=>/d")
+    with self.assertRaises(IllegalArgumentException):
+      Dtab.from_bytes(b"DTAB")
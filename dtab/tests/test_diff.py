@@ -0,0 +1,41 @@
+from dtab.diff import increasing_run
+from dtab.dtab import Dtab, Dentry
+from unittest import TestCase
+import random
+
+
+class DtabDiffTest(TestCase):
+
+  def test_diff(self):
+    old = Dtab.read("/a=>/b;/c=>/d;/e=>/f;/g=>/h;/i=>/j")
+    new = Dtab.read("/a=>/b;/e=>/f;/g=>/h;/c=>/d;/k=>/l;/i=>/j")
+    diff = old.diff(new)
+    self.assertTrue(diff.removed == [])
+    self.assertTrue(diff.added == [(4, Dentry.read("/k=>/l"))])
+    self.assertTrue(diff.moved == [(1, 3, Dentry.read("/c=>/d"))])
+    self.assertTrue(not diff.is_empty and old.diff(old).is_empty)
+    self.assertTrue(new.diff(old).removed == [(4, Dentry.read("/k=>/l"))])
+
+    # equal trees are compared structurally, whatever the syntax
+    self.assertTrue(Dtab.read("/a => /b | ( /c )").diff(Dtab.read("/a=>/b|/c")).is_empty)
+    self.assertTrue(Dtab.read("/a=>/b;/a=>/b").diff(Dtab.read("/a=>/b")).removed ==
+                    [(1, Dentry.read("/a=>/b"))])
+
+  def test_diff_replays(self):
+    rng = random.Random(0)
+    pool = [Dentry.read("/p{}=>/q{}".format(i % 7, i % 5)) for i in range(12)]
+    for _ in range(200):
+      old = Dtab([rng.choice(pool) for _ in range(rng.randrange(10))])
+      new = Dtab([rng.choice(pool) for _ in range(rng.randrange(10))])
+      diff = old.diff(new)
+      # removing the removed and moved dentries leaves a common subsequence
+      dropped = set(i for i, _ in diff.removed) | set(i for i, _, _ in diff.moved)
+      inserted = set(j for j, _ in diff.added) | set(j for _, j, _ in diff.moved)
+      self.assertTrue([d for i, d in enumerate(old.dentries) if i not in dropped] ==
+                      [d for j, d in enumerate(new.dentries) if j not in inserted])
+
+  def test_increasing_run(self):
+    self.assertTrue(increasing_run([]) == [])
+    values = [3, 1, 4, 1, 5, 9, 2, 6]
+    run = increasing_run(values)
+    self.assertTrue(len(run) == 4 and all(values[i] < values[j] for i, j in zip(run, run[1:])))
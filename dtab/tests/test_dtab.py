@@ -1,4 +1,5 @@
 from dtab.dtab import Dtab, Dentry
+from dtab.error import IllegalArgumentException
 from dtab.name import Name
 from dtab.path import Path
 from dtab.tree import NameTree
@@ -76,3 +77,110 @@ class DtabTest(TestCase):
     nametree = dtab.lookup(Path.read("/a/b/c/e/f"))
     leaf = NameTree.Leaf(Name.Path(Path.read("/d/e/f")))
     self.assertTrue(nametree == leaf)
+
+  def test_lookup_only_visits_matching_prefixes(self):
+    Prefix = Dentry.Prefix
+    dtab = Dtab([
+        Dentry(Prefix(), NameTree.Leaf(Path.Utf8("root"))),
+        Dentry(Prefix("a", Prefix.AnyElem), NameTree.Leaf(Path.Utf8("wild"))),
+        Dentry(Prefix("b"), NameTree.Leaf(Path.Utf8("other"))),
+        Dentry(Prefix("a", "x"), NameTree.Leaf(Path.Utf8("exact"))),
+        Dentry(Prefix("a"), NameTree.Leaf(Path.Utf8("short"))),
+    ])
+    path = Path.Utf8("a", "x", "y")
+    expected = [d for d in dtab if d.prefix.matches(path)]
+    self.assertTrue(dtab.index.matches(path) == expected)
+    self.assertTrue([d.nametree.value.show for d in expected] ==
+                    ["/short", "/exact", "/wild", "/root"])
+
+    nametree = dtab.lookup(path)
+    self.assertTrue([t.value.show for t in nametree] ==
+                    ["/short/x/y", "/exact/y", "/wild/y", "/root/a/x/y"])
+    self.assertTrue(dtab.lookup(Path.Utf8("c")) == NameTree.Leaf(Path.Utf8("root", "c")))
+    self.assertTrue(Dtab.empty.lookup(Path.Utf8("c")) == NameTree.Neg)
+
+  def test_compiled_lookup_matches_lookup(self):
+    dtab = Dtab.read("""
+      / => /root;
+      /a => /b | ~;
+      /a/* => 2 * /w & /v;
+      /*/c => /any/c;
+      /a/c => !;
+      /a/c/d => /e/f | $;
+      /x/*/z => /y
+    """)
+    compiled = dtab.compile()
+    self.assertTrue(dtab.compile() is compiled)
+    for show in ["/", "/a", "/a/c", "/a/c/d/e", "/b/c", "/x/y/z", "/x/y", "/q/r"]:
+      path = Path.read(show)
+      self.assertTrue(compiled.lookup(path) == dtab.lookup(path))
+      self.assertTrue(compiled.lookup(path, simplify=True) == dtab.lookup(path, simplify=True))
+
+  def test_concat_shares_segments(self):
+    base = Dtab.read(";".join("/s{}=>/b{}".format(i, i) for i in range(64)))
+    local = Dtab.read("/s1=>/local;/x=>/y")
+    base_index = base.segments[0].index
+
+    merged = base + local
+    self.assertTrue(merged.segments[0] is base.segments[0])
+    self.assertTrue(merged.segments[0].index is base_index)
+    self.assertTrue(base.length == 64 and local.length == 2 and merged.length == 66)
+    self.assertTrue(merged.dentries == base.dentries + local.dentries)
+    self.assertTrue(merged == Dtab(list(base.dentries) + list(local.dentries)))
+    self.assertTrue(merged.lookup(Path.read("/s1/z")) == NameTree.Alt(
+        NameTree.Leaf(Path.read("/local/z")), NameTree.Leaf(Path.read("/b1/z"))))
+
+    dtab = Dtab.empty
+    for i in range(100):
+      dtab = dtab.copy(Dentry.read("/a=>/b{}".format(i)))
+    self.assertTrue(dtab.length == 100 and len(dtab.segments) <= 7)
+    self.assertTrue([d for d in dtab] == list(reversed(dtab.dentries)))
+    self.assertTrue(dtab.lookup(Path.read("/a")) == NameTree.Alt(
+        *[NameTree.Leaf(Path.Utf8("b{}".format(i))) for i in reversed(range(100))]))
+
+  def test_lookup_many(self):
+    dtab = Dtab.read("""
+      / => /root;
+      /a => /b | ~;
+      /a/* => /w;
+      /*/c => /any/c;
+      /a/c/d => /e/f
+    """) + Dtab.read("/a/c => /local")
+    paths = [Path.read(p) for p in ["/a/c/d/e", "/", "/a/c", "/q/r/s", "/a/c", "/a", "/x/c/y",
+                                    "/a/x/y", "/a/z/y", "/q/r", "/a/c/d"]]
+    expected = [dtab.lookup(p) for p in paths]
+    self.assertTrue(dtab.lookup_many(paths) == expected)
+    self.assertTrue(dtab.index.matches_many(paths) == [dtab.index.matches(p) for p in paths])
+    self.assertTrue(list(dtab.iter_lookup(iter(paths), batch_size=3)) == expected)
+    self.assertTrue(dtab.lookup_many(paths, simplify=True) == [t.simplified for t in expected])
+    self.assertTrue(Dtab.empty.lookup_many(paths) == [NameTree.Neg] * len(paths))
+
+  def test_lazy_read(self):
+    source = """
+      /a => /b | ~;
+      /c/* => /d & (;
+      /e => /f
+    """
+    dtab = Dtab.read(source, lazy=True)
+    self.assertTrue(dtab.length == 3)
+    self.assertTrue(not any(d.parsed for d in dtab.dentries))
+    self.assertTrue(dtab.lookup(Path.read("/e/g")) == NameTree.Leaf(Path.read("/f/g")))
+    self.assertTrue([d.parsed for d in dtab.dentries] == [False, False, True])
+
+    # the invalid tree is only reported when it is needed
+    with self.assertRaises(IllegalArgumentException) as eager:
+      Dtab.read(source)
+    with self.assertRaises(IllegalArgumentException) as lazy:
+      dtab.validate()
+    self.assertTrue(str(lazy.exception) == str(eager.exception))
+    with self.assertRaises(IllegalArgumentException):
+      dtab.lookup(Path.read("/c/x"))
+
+    valid = Dtab.read("/a => /b | ~; /c/* => /d", lazy=True)
+    self.assertTrue(valid.validate() is valid)
+    self.assertTrue(valid == Dtab.read("/a => /b | ~; /c/* => /d"))
+    for lazy, fast in [(True, False), (False, True)]:
+      self.assertTrue(Dtab.read("/a => /b | ~; /c/* => /d", lazy=lazy, fast=fast) == valid)
+      with self.assertRaises(IllegalArgumentException) as error:
+        Dtab.read(source, lazy=lazy, fast=fast).validate()
+      self.assertTrue(str(error.exception) == str(eager.exception))
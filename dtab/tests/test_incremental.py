@@ -0,0 +1,43 @@
+from dtab.dtab import Dtab
+from dtab.error import IllegalArgumentException
+from dtab.incremental import IncrementalReader
+from unittest import TestCase
+
+
+class IncrementalReaderTest(TestCase):
+
+  def test_reuses_unchanged_dentries(self):
+    old = """
+      # base dtab; do not edit
+      /#foo => /biz # comment; with a separator
+             | /bar;
+      /srv => 2 * /a & /b;
+      /svc => /srv
+    """
+    old_dtab = Dtab.read(old)
+    reader = IncrementalReader(old, old_dtab)
+
+    new = old.replace("/svc => /srv", "/svc => /srv | /fallback") + ";/x => /y;"
+    dtab = reader.read(new)
+    self.assertTrue(dtab == Dtab.read(new))
+    self.assertTrue(reader.reused == 2 and reader.parsed == 2)
+    self.assertTrue(dtab.dentries[0] is old_dtab.dentries[0])
+    self.assertTrue(dtab.dentries[1] is old_dtab.dentries[1])
+
+    # reordering and duplicating reuse the objects too
+    swapped = "/srv => 2 * /a & /b; /x => /y; /srv => 2 * /a & /b"
+    dtab = reader.read(swapped)
+    self.assertTrue(dtab == Dtab.read(swapped) and reader.parsed == 3)
+    self.assertTrue(reader.read("") == Dtab.empty)
+
+  def test_errors_match_full_parse(self):
+    reader = IncrementalReader("/a => /b; /c => /d")
+    for bad in ["/a => /b; /c => /d /e", "/a => /b;; /c => /d", "/a => /b; /c => (/d", "; /a => /b"]:
+      messages = []
+      for read in (Dtab.read, reader.read):
+        try:
+          read(bad)
+        except IllegalArgumentException as e:
+          messages.append(str(e))
+      self.assertTrue(len(messages) == 2 and messages[0] == messages[1])
+    self.assertTrue(reader.dtab == Dtab.read("/a => /b; /c => /d"))
@@ -0,0 +1,58 @@
+from dtab.dtab import Dtab, Dentry
+from dtab.error import IllegalArgumentException
+from dtab.mapped import MappedDtab
+from dtab.path import Path
+from unittest import TestCase
+import os
+import tempfile
+
+
+class MappedDtabTest(TestCase):
+
+  DTAB = Dtab.read("""
+    /zk => /$/inet/zk/2181;
+    /s/*/web => /srv/web | /srv/fallback;
+    /s => /srv;
+    /srv/web => 0.5 * /$/inet/web1/80 & 0.5 * /$/inet/web2/80
+  """)
+
+  def setUp(self):
+    fd, self.filename = tempfile.mkstemp()
+    os.close(fd)
+    MappedDtab.write(self.DTAB, self.filename)
+
+  def tearDown(self):
+    os.remove(self.filename)
+
+  def test_lookup(self):
+    mapped = MappedDtab.open(self.filename)
+    try:
+      for show in ["/zk", "/s/a/web/x", "/s/web", "/srv/web", "/nope", "/"]:
+        path = Path.read(show)
+        self.assertTrue(mapped.lookup(path) == self.DTAB.lookup(path))
+      self.assertTrue(mapped.lookup_many([Path.read("/s/b/web")]) ==
+                      self.DTAB.lookup_many([Path.read("/s/b/web")]))
+      self.assertTrue(mapped.bind(Path.read("/s/a/web")) ==
+                      self.DTAB.bind(Path.read("/s/a/web")))
+      self.assertTrue(mapped.dentry(1) == self.DTAB.dentries[1])
+      self.assertTrue(mapped.length == 4 and mapped == self.DTAB)
+    finally:
+      mapped.close()
+
+  def test_is_a_dtab(self):
+    mapped = MappedDtab(self.DTAB.to_bytes(index=True))
+    base = Dtab.base
+    try:
+      Dtab.base = mapped
+      self.assertTrue(Dtab.base is mapped)
+    finally:
+      Dtab.base = base
+    dentry = Dentry.read("/a=>/b")
+    appended = mapped + dentry
+    self.assertTrue(type(appended) is Dtab)
+    self.assertTrue(appended.dentries == self.DTAB.dentries + (dentry,))
+    self.assertTrue(Dtab.read("/x=>/y") + mapped == Dtab.read("/x=>/y") + self.DTAB)
+
+  def test_requires_index(self):
+    with self.assertRaises(IllegalArgumentException):
+      MappedDtab(self.DTAB.to_bytes())
@@ -0,0 +1,112 @@
+from dtab.dtab import Dtab
+from dtab.name import Address, Bound
+from dtab.namer import InetNamer, Namer, NamerRegistry
+from dtab.path import Path
+from dtab.tree import NameTree
+from unittest import TestCase
+import asyncio
+
+
+class StubNamer(Namer):
+  """Binds /$/stub/<name> to <name>:80, once `started` names are being
+     looked up at the same time"""
+  ttl = 10
+
+  def __init__(self, started=1):
+    self.calls = []
+    self._started = started
+    self._event = None
+
+  async def lookup(self, path):
+    if self._event is None:
+      self._event = asyncio.Event()
+    self.calls.append(path.show)
+    if len(self.calls) >= self._started:
+      self._event.set()
+    await self._event.wait()
+    return NameTree.Leaf(Bound(Address.bound((path.elems[0], 80)), id=path))
+
+
+class NamerRegistryTest(TestCase):
+
+  def run_async(self, coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+      return loop.run_until_complete(coroutine)
+    finally:
+      loop.close()
+
+  def test_builtin_namers(self):
+    registry = NamerRegistry({'inet': InetNamer(resolve=False)})
+    registry.register('fail', NamerRegistry.default.get('fail'))
+    registry.register('nil', NamerRegistry.default.get('nil'))
+    dtab = Dtab.read("/web => /$/inet/web.local/8080 | /$/nil; /db => /$/fail; /x => /$/inet/oops")
+    web = self.run_async(registry.resolve(Path.read("/web/api"), dtab))
+    self.assertTrue(web == NameTree.Alt(NameTree.Leaf(Bound(
+        Address.bound(("web.local", 8080)), Path.read("/$/inet/web.local/8080"), Path.read("/api"))),
+        NameTree.Empty))
+    self.assertTrue(self.run_async(registry.resolve(Path.read("/db"), dtab)) is NameTree.Fail)
+    self.assertTrue(self.run_async(registry.resolve(Path.read("/x"), dtab)) is NameTree.Neg)
+    self.assertTrue(self.run_async(registry.lookup(Path.read("/$/nil"))) is NameTree.Empty)
+    self.assertTrue(self.run_async(registry.lookup(Path.read("/$/unknown/x"))) is NameTree.Fail)
+
+  def test_falls_back_from_neg(self):
+    class NegNamer(Namer):
+      async def lookup(self, path):
+        return NameTree.Neg
+    registry = NamerRegistry({'inet': InetNamer(resolve=False), 'neg': NegNamer()})
+    dtab = Dtab.read("/x => /$/inet/oops | /$/inet/h/1; /y => /$/neg/a | /$/inet/h/2 | /$/inet/h/3")
+    self.assertTrue(self.run_async(registry.resolve(Path.read("/x"), dtab)) == NameTree.Leaf(Bound(
+        Address.bound(("h", 1)), Path.read("/$/inet/h/1"))))
+    self.assertTrue(self.run_async(registry.resolve(Path.read("/y"), dtab)) == NameTree.Alt(
+        NameTree.Leaf(Bound(Address.bound(("h", 2)), Path.read("/$/inet/h/2"))),
+        NameTree.Leaf(Bound(Address.bound(("h", 3)), Path.read("/$/inet/h/3")))))
+
+  def test_concurrent_lookups(self):
+    stub = StubNamer(started=3)
+    registry = NamerRegistry({'stub': stub})
+    tree = NameTree.read("/$/stub/a | /$/stub/b & /$/stub/c | /$/stub/a")
+    # each lookup waits for all three to have started, so they must run concurrently
+    bound = self.run_async(registry.bind(tree))
+    self.assertTrue(sorted(stub.calls) == ["/a", "/b", "/c"])
+    self.assertTrue(bound == NameTree.Alt(
+        NameTree.Leaf(Bound(Address.bound(("a", 80)), Path.read("/a"))),
+        NameTree.Union(NameTree.Weighted(1.0, NameTree.Leaf(Bound(Address.bound(("b", 80)), Path.read("/b")))),
+                       NameTree.Weighted(1.0, NameTree.Leaf(Bound(Address.bound(("c", 80)), Path.read("/c"))))),
+        NameTree.Leaf(Bound(Address.bound(("a", 80)), Path.read("/a")))))
+
+  def test_cancelled_caller(self):
+    stub = StubNamer(started=2)
+    registry = NamerRegistry({'stub': stub})
+    path = Path.read("/$/stub/a")
+
+    async def lookups():
+      first = asyncio.ensure_future(registry.lookup(path))
+      second = asyncio.ensure_future(registry.lookup(path))
+      await asyncio.sleep(0)
+      first.cancel()
+      # the shared lookup only finishes once another one starts
+      third = asyncio.ensure_future(registry.lookup(Path.read("/$/stub/b")))
+      return await second, await third, first.cancelled()
+
+    second, _, cancelled = self.run_async(lookups())
+    self.assertTrue(cancelled and second == NameTree.Leaf(Bound(Address.bound(("a", 80)), Path.read("/a"))))
+    self.assertTrue(registry.cache.get(path) is not None)
+
+  def test_ttl_cache(self):
+    now = [0.0]
+    stub = StubNamer()
+    registry = NamerRegistry({'stub': stub}, clock=lambda: now[0])
+    path = Path.read("/$/stub/a")
+    first = self.run_async(registry.lookup(path))
+    now[0] = 9.0
+    self.assertTrue(self.run_async(registry.lookup(path)) is first)
+    self.assertTrue(len(stub.calls) == 1 and registry.cache.stats['hits'] == 1)
+    now[0] = 10.0
+    self.run_async(registry.lookup(path))
+    self.assertTrue(len(stub.calls) == 2)
+
+  def test_address(self):
+    self.assertTrue(Address.pending.state == Address.PENDING and Address.neg.show == "Neg")
+    self.assertTrue(Address.bound(("b", 2), ("a", 1)).show == "Bound(a:1,b:2)")
+    self.assertTrue(Address.bound(("a", 1)) == Address.bound(("a", 1)))
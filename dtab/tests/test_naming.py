@@ -0,0 +1,67 @@
+from dtab.dtab import Dtab
+from dtab.error import IllegalArgumentException
+from dtab.naming import DefaultInterpreter
+from dtab.path import Path
+from dtab.tree import NameTree
+from unittest import TestCase
+
+
+class DefaultInterpreterTest(TestCase):
+
+  def test_binds_to_namer_paths(self):
+    dtab = Dtab.read("""
+      /zk => /$/inet/zk/2181;
+      /srv => /zk/prod;
+      /srv/legacy => ~;
+      /srv/legacy/x => /nowhere;
+      /svc => /srv | /$/fail;
+      /svc/web => 3 * /srv/web & 1 * /srv/canary
+    """)
+    self.assertTrue(dtab.bind(Path.read("/svc/web")) == NameTree.read("""
+        3 * /$/inet/zk/2181/prod/web & 1 * /$/inet/zk/2181/prod/canary |
+        /$/inet/zk/2181/prod/web |
+        /$/fail/web
+    """))
+    self.assertTrue(dtab.bind(Path.read("/srv/legacy/x")) == NameTree.read(
+        "/$/inet/zk/2181/prod/legacy/x"))
+    self.assertTrue(dtab.bind(Path.read("/nowhere")) == NameTree.Neg)
+    self.assertTrue(dtab.bind(Path.read("/$/inet/h/80")) == NameTree.read("/$/inet/h/80"))
+
+  def test_cycles_and_depth(self):
+    with self.assertRaises(IllegalArgumentException) as ctx:
+      Dtab.read("/a => /b; /b => /c | /a").bind(Path.read("/a"))
+    self.assertTrue("/a -> /b -> /a" in str(ctx.exception))
+
+    growing = Dtab.read("/a => /a/a")
+    with self.assertRaises(IllegalArgumentException):
+      growing.bind(Path.read("/a"))
+    with self.assertRaises(IllegalArgumentException):
+      DefaultInterpreter(growing, max_depth=5).bind(Path.read("/a"))
+
+  def test_alt_fallbacks(self):
+    # namer leaves may still go Neg, so the branches after them are kept
+    dtab = Dtab.read("/x => /$/inet/oops | /y | /$/nil | /z; /y => /$/inet/h/1")
+    self.assertTrue(dtab.bind(Path.read("/x")) == NameTree.read("/$/inet/oops | /$/inet/h/1 | /$/nil"))
+
+    # an error behind kept branches is only reached if they all go Neg
+    dtab = Dtab.read("/a => /b; /b => /a; /a => /$/inet/h/80")
+    self.assertTrue(dtab.bind(Path.read("/a")) == NameTree.read("/$/inet/h/80 | !"))
+    dtab = Dtab.read("/srv => /srv/x; /srv => /$/inet/h/80")
+    bound = dtab.bind(Path.read("/srv/y"))
+    self.assertTrue(bound.trees[0] == NameTree.read("/$/inet/h/80/y") and bound.trees[-1] is NameTree.Fail)
+
+    dtab = Dtab.read("/a => /nowhere | ! | /b; /b => /b/b")
+    self.assertTrue(dtab.bind(Path.read("/a")) == NameTree.Fail)
+
+  def test_memoizes_shared_paths(self):
+    dtab = Dtab.read("/a => /c & /c; /c => /$/inet/h/80")
+    lookups = []
+    lookup = dtab.lookup
+
+    def counting_lookup(path, **kwargs):
+      lookups.append(path)
+      return lookup(path, **kwargs)
+    dtab.lookup = counting_lookup
+
+    dtab.bind(Path.read("/a"))
+    self.assertTrue(lookups == [Path.read("/a"), Path.read("/c")])
@@ -0,0 +1,66 @@
+from dtab.dtab import Dtab, Dentry
+from dtab.observe import ObservableBindings, changed_dentries
+from dtab.path import Path
+from dtab.tree import NameTree
+from unittest import TestCase
+
+
+class ObservableBindingsTest(TestCase):
+
+  DTAB = Dtab.read("""
+    /srv => /$/inet/old/80;
+    /s/web => /srv/web;
+    /s/db => /$/inet/db/5432
+  """)
+
+  def test_updates_only_affected_paths(self):
+    bindings = ObservableBindings(self.DTAB)
+    seen = {'web': [], 'db': []}
+    bindings.subscribe(Path.read("/s/web"), seen['web'].append)
+    bindings.subscribe(Path.read("/s/db"), seen['db'].append)
+    self.assertTrue(seen['web'] == [NameTree.read("/$/inet/old/80/web")])
+    self.assertTrue(bindings.rebinds == 2)
+
+    # /srv is only looked up while binding /s/web
+    bindings.update(self.DTAB + Dtab.read("/srv => /$/inet/new/80"))
+    self.assertTrue(bindings.rebinds == 3)
+    self.assertTrue(seen['web'][1:] == [NameTree.read("/$/inet/new/80/web | /$/inet/old/80/web")])
+    self.assertTrue(len(seen['db']) == 1)
+
+    # a rebound path whose tree does not change is not called back
+    bindings.update(bindings.dtab + Dtab.read("/s/db/x => /$/nil"))
+    self.assertTrue(bindings.rebinds == 3 and len(seen['db']) == 1)
+    bindings.update(bindings.dtab + Dtab.read("/s/* => ~"))
+    self.assertTrue(bindings.rebinds == 5 and len(seen['db']) == 1)
+
+  def test_errors_and_cancel(self):
+    bindings = ObservableBindings(self.DTAB)
+    trees, errors = [], []
+    subscription = bindings.subscribe(Path.read("/s/web"), trees.append, errors.append)
+    bindings.update(self.DTAB + Dtab.read("/srv => /s"))
+    self.assertTrue(len(errors) == 1 and subscription.error is errors[0])
+    bindings.update(self.DTAB)
+    self.assertTrue(len(trees) == 2 and subscription.error is None)
+    subscription.cancel()
+    bindings.update(Dtab.empty)
+    self.assertTrue(len(trees) == 2)
+
+  def test_follows_base(self):
+    base = Dtab.base
+    Dtab.base = self.DTAB
+    bindings = ObservableBindings()
+    trees = []
+    try:
+      bindings.subscribe(Path.read("/s/db"), trees.append)
+      Dtab.base = Dtab.read("/s/db => /$/inet/db2/5432")
+      self.assertTrue(trees[-1] == NameTree.read("/$/inet/db2/5432"))
+    finally:
+      bindings.close()
+      Dtab.base = base
+    self.assertTrue(len(trees) == 2)
+
+  def test_changed_dentries(self):
+    old = Dtab.read("/a=>/b;/c=>/d;/e=>/f;/g=>/h")
+    new = Dtab.read("/a=>/b;/e=>/f;/c=>/d;/g=>/h")
+    self.assertTrue(changed_dentries(old, old) == [])
+    self.assertTrue(changed_dentries(old, new) == [Dentry.read("/c=>/d")])
@@ -4,6 +4,7 @@ from dtab.parser import NameTreeParsers
 from dtab.path import Path
 from dtab.tree import NameTree
 from unittest import TestCase
+import io
 
 
 class NameTreeParserTest(TestCase):
@@ -146,3 +147,44 @@ class NameTreeParserTest(TestCase):
         Dentry(Path.empty, NameTree.Fail),
         Dentry(Path.Utf8("foo"), NameTree.Leaf(Path.Utf8("bar")))
     ]))
+
+  def test_fast_parser_matches_default(self):
+    dtab = """
+      # generated
+      /svc/*/http => 1 * /$/inet/\\x66oo/80 & .5 * /srv/b | ~ ;
+      /srv => (/a | !) & $ # trailing
+    """
+    self.assertTrue(
+        str(NameTreeParsers.parseDtab(dtab, fast=True)) == str(NameTreeParsers.parseDtab(dtab)))
+    self.assertTrue(
+        NameTreeParsers.parsePath("/\\x66\\x6f\\x6f", fast=True) == Path.Utf8("foo"))
+
+    for bad in ["/foo^bar", "/foo/bar/", "/\\x0?", "/a => 0.1.2 * /b", "/a => /b &", "/a=>(/b"]:
+      for parse in (NameTreeParsers.parsePath, NameTreeParsers.parseDtab):
+        messages = []
+        for fast in (False, True):
+          try:
+            parse(bad, fast=fast)
+          except IllegalArgumentException as e:
+            messages.append(str(e))
+        self.assertTrue(len(messages) == 2 and messages[0] == messages[1])
+
+  def test_iterDentries(self):
+    dtab = """# generated
+      /#foo => /biz # comment; not a separator
+             | /bar;
+      /a/*#c;
+      => 2#weight
+      * /w ; /q => ~;
+      # trailing"""
+    expected = NameTreeParsers.parseDtab(dtab)
+    for chunk_size in (1, 2, 7, 4096):
+      self.assertTrue(Dtab(list(Dtab.iter_read(io.StringIO(dtab), chunk_size))) == expected)
+      self.assertTrue(
+          Dtab(list(Dentry.iter_read(io.BytesIO(dtab.encode('utf-8')), chunk_size))) == expected)
+
+    dentries = Dtab.iter_read(io.StringIO("/a => /b;\n/c =>\n  /d &;\n/e => /f"), 4)
+    self.assertTrue(next(dentries) == Dentry.read("/a => /b"))
+    with self.assertRaises(IllegalArgumentException) as ctx:
+      next(dentries)
+    self.assertTrue(str(ctx.exception).endswith("at line 3, column 7"))
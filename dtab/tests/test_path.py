@@ -1,4 +1,6 @@
 from dtab.parser import NameTreeParsers
+from dtab.path import Path
+from dtab.tree import NameTree
 from unittest import TestCase
 
 
@@ -6,3 +8,44 @@ class PathTest(TestCase):
 
   def test_show(self):
     self.assertTrue(NameTreeParsers.parsePath("/foo/bar").show == "/foo/bar")
+
+  def test_value_semantics(self):
+    path = Path.Utf8("foo", "bar")
+    self.assertTrue(path == Path.read("/foo/bar"))
+    self.assertTrue(path != Path.Utf8("foo"))
+    self.assertTrue({path: 1}[Path.read("/foo/bar")] == 1)
+    self.assertTrue(isinstance(path.elems, tuple))
+    with self.assertRaises(AttributeError):
+      path.other = 1
+
+  def test_append_and_add(self):
+    path = Path.Utf8("foo")
+    self.assertTrue(path.append("bar") == Path.Utf8("foo", "bar"))
+    self.assertTrue(path.append(NameTree.Leaf(Path.Utf8("bar"))) == Path.Utf8("foo", "bar"))
+    self.assertTrue(path == Path.Utf8("foo"))
+    self.assertTrue(path + Path.Utf8("bar") == Path.Utf8("foo", "bar"))
+    self.assertTrue(path + ("bar", "baz") == Path.Utf8("foo", "bar", "baz"))
+    self.assertTrue(Path.read("/a/b").startswith(Path.read("/a")))
+    self.assertFalse(Path.read("/ab").startswith(Path.read("/a")))
+
+  def test_intern_elems(self):
+    Path.intern_elems = True
+    try:
+      a = Path.Utf8("".join(["sh", "ared"]))
+      b = Path.Utf8("".join(["sha", "red"]))
+    finally:
+      Path.intern_elems = False
+    self.assertTrue(a.elems[0] is b.elems[0])
+
+  def test_concat(self):
+    head = Path.read("/srv/web")
+    elems = ("svc", "web", "v1", "health")
+    path = head.concat(elems, 2)
+    self.assertTrue(path.size == 4 and not path.is_empty)
+    self.assertTrue(path == Path.read("/srv/web/v1/health"))
+    self.assertTrue(hash(path) == hash(Path.read("/srv/web/v1/health")))
+    self.assertTrue(path.show == "/srv/web/v1/health")
+    self.assertTrue(path.elems[2] is elems[2])
+    self.assertTrue(path.startswith(head) and path.concat(("x",)).size == 5)
+    self.assertTrue(head.concat(elems, 4) is head)
+    self.assertTrue(Path.empty.concat(elems) == Path.Utf8(*elems))
@@ -0,0 +1,42 @@
+from collections import Counter
+from dtab.path import Path
+from dtab.sampler import AliasTable, UnionSampler
+from dtab.tree import NameTree
+from random import Random
+from unittest import TestCase
+
+
+class UnionSamplerTest(TestCase):
+
+  def test_alias_table_distribution(self):
+    table = AliasTable([1, 0, 3, 4])
+    rng = Random(7)
+    counts = Counter(table.pick(rng) for _ in range(80000))
+    self.assertTrue(counts[1] == 0)
+    for index, weight in [(0, 1), (2, 3), (3, 4)]:
+      self.assertTrue(abs(counts[index] / 80000.0 - weight / 8.0) < 0.01)
+
+    with self.assertRaises(ValueError):
+      AliasTable([0, 0])
+
+  def test_sampler(self):
+    union = NameTree.read("3 * /a & 1 * /b & 0 * /c")
+    a, b = NameTree.Leaf(Path.Utf8("a")), NameTree.Leaf(Path.Utf8("b"))
+
+    sampler = UnionSampler(union, rng=Random(1))
+    picks = sampler.sample(4000)
+    self.assertTrue(set(picks) == {a, b})
+    self.assertTrue(abs(picks.count(a) / 4000.0 - 0.75) < 0.03)
+    self.assertTrue(UnionSampler(union, rng=Random(1)).sample(50) ==
+                    UnionSampler(union, rng=Random(1)).sample(50))
+
+    table = sampler.table
+    sampler.update(NameTree.read("3 * /a & 1 * /b & 0 * /c"))
+    self.assertTrue(sampler.table is table)
+    sampler.update(NameTree.read("1 * /b & 0 * /a"))
+    self.assertTrue(set(sampler.sample(100)) == {b})
+    sampler.update(a)
+    self.assertTrue(sampler.pick() is a)
+
+    with self.assertRaises(ValueError):
+      UnionSampler(NameTree.read("0 * /a & 0 * /b"))
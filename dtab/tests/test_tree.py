@@ -0,0 +1,74 @@
+from dtab.dtab import Dentry, Dtab
+from dtab.path import Path
+from dtab.tree import HashConsTable, NameTree
+from unittest import TestCase
+
+
+class NameTreeTest(TestCase):
+
+  def test_structural_equality_and_hash(self):
+    t1 = NameTree.read("/a | 2 * /b & /c | !")
+    t2 = NameTree.read("/a | 2*/b & /c | !")
+    self.assertTrue(t1 is not t2)
+    self.assertTrue(t1 == t2 and hash(t1) == hash(t2))
+    self.assertTrue(t1 != NameTree.read("/a | 2 * /b & /d | !"))
+    self.assertTrue(t1 != NameTree.read("/a | 3 * /b & /c | !"))
+    self.assertTrue(NameTree.Leaf(Path.Utf8("a")) != NameTree.Neg)
+    self.assertTrue(NameTree.Alt(NameTree.Neg) != NameTree.Union(
+        NameTree.Weighted(1, NameTree.Neg)))
+
+    seen = {t1: 1, NameTree.Neg: 2, NameTree.Fail: 3}
+    self.assertTrue(seen[t2] == 1 and seen[NameTree.Neg] == 2)
+    self.assertTrue(len({t1, t2, NameTree.read("/a")}) == 2)
+
+  def test_dentry_and_dtab_equality(self):
+    d1 = Dentry.read("/a/*/c => /b | ~")
+    d2 = Dentry.read("/a/*/c=>/b|~")
+    self.assertTrue(d1 == d2 and hash(d1) == hash(d2))
+    self.assertTrue(d1 != Dentry.read("/a/c/* => /b | ~"))
+    self.assertTrue(Dentry.Prefix.read("/a/*") != Dentry.Prefix.read("/a/b"))
+    self.assertTrue(Dtab.read("/a=>/b;/c=>/d") == Dtab([d for d in Dtab.read("/a=>/b;/c=>/d").dentries]))
+    self.assertTrue(Dtab.read("/a=>/b;/c=>/d") != Dtab.read("/c=>/d;/a=>/b"))
+
+  def test_map_rebuilds_compound_trees(self):
+    tree = NameTree.read("/a | 2 * /b & /c | ~")
+    mapped = tree.map(lambda leaf: leaf.value + ("x",))
+    self.assertTrue(mapped == NameTree.read("/a/x | 2 * /b/x & /c/x | ~"))
+
+  def test_hash_consing(self):
+    NameTree.hash_consing = HashConsTable()
+    try:
+      dtab = Dtab.read("/a => /$/inet/h/80 & /b; /c => /$/inet/h/80 & /b")
+      t1, t2 = [d.nametree for d in dtab.dentries]
+      self.assertTrue(t1 is t2)
+      self.assertTrue(dtab.lookup(Path.read("/a")) is t1)
+      self.assertTrue(NameTree.Leaf(Path.Utf8("b")) is list(t1)[1].tree)
+      self.assertTrue(len(NameTree.hash_consing) > 0)
+    finally:
+      NameTree.hash_consing = None
+    self.assertTrue(NameTree.Leaf(Path.Utf8("b")) is not NameTree.Leaf(Path.Utf8("b")))
+
+  def test_simplified(self):
+    def simplified(s):
+      return NameTree.read(s).simplified
+
+    self.assertTrue(simplified("~ | /a | (/b | ~) | /c") == NameTree.read("/a | /b | /c"))
+    self.assertTrue(simplified("~ | ! | /a") == NameTree.Fail)
+    self.assertTrue(simplified("/a | ! | /b") == NameTree.read("/a | !"))
+    self.assertTrue(simplified("(/a | !) | /b") == NameTree.read("/a | !"))
+    self.assertTrue(simplified("(/a | ~ | !) | ! | /b") == NameTree.read("/a | !"))
+    self.assertTrue(simplified("~ | ~") == NameTree.Neg)
+    self.assertTrue(simplified("(/a | ~)") == NameTree.read("/a"))
+    self.assertTrue(simplified("0 * /a & 2 * /b & ~") == NameTree.read("/b"))
+    self.assertTrue(simplified("1 * /a & 2 * (/b | ~) & 0 * /c") == NameTree.read("1 * /a & 2 * /b"))
+    self.assertTrue(simplified("0 * /a & ~") == NameTree.Neg)
+    self.assertTrue(simplified("$ | /a") == NameTree.read("$ | /a"))
+
+    tree = NameTree.read("/a | /b")
+    self.assertTrue(tree.simplified is tree.simplified)
+
+  def test_lookup_simplify(self):
+    dtab = Dtab.read("/a => /b; /a => ~; /a/c => /d | ~")
+    path = Path.read("/a/c")
+    self.assertTrue(dtab.lookup(path) == NameTree.read("(/d | ~) | ~ | /b/c"))
+    self.assertTrue(dtab.lookup(path, simplify=True) == NameTree.read("/d | /b/c"))
@@ -1,3 +1,6 @@
+from weakref import WeakValueDictionary
+
+
 class NameTreeBase(type):
   Alt = property(lambda _: Alt)
   Empty = property(lambda _: Empty)
@@ -11,23 +14,122 @@ class NameTreeBase(type):
   def unionFail(cls):
     return [cls.Weighted(cls.Weighted.defaultWeight, cls.Fail)]
 
-  def read(s):
+  def read(cls, s):
     from dtab.parser import NameTreeParsers
     return NameTreeParsers.parseNameTree(s)
 
   def map_tree(cls, tree, func):
     if isinstance(tree, cls.Union):
-      return Union(*[
-          Weighted(t.weight, t.map(func)) for t in tree if isinstance(t, Weighted)])
+      return Union(*[t.map(func) for t in tree])
+    if isinstance(tree, cls.Weighted):
+      return Weighted(tree.weight, tree.tree.map(func))
     if isinstance(tree, cls.Alt):
-      return Alt(*list(map(func, tree)))
+      return Alt(*[t.map(func) for t in tree])
     if isinstance(tree, cls.Leaf):
       return cls.Leaf(func(tree))
-    if isinstance(tree, (cls.Fail, cls.Neg, cls.Empty)):
+    if tree is cls.Fail or tree is cls.Neg or tree is cls.Empty:
+      return tree
+
+  def simplify_tree(cls, tree, memo=None):
+    """Simplify `tree` in one bottom-up pass, as Finagle's
+       NameTree.simplified does: nested Alts are flattened, Neg branches
+       dropped, an Alt is cut short after a Fail, zero-weight and Neg
+       branches leave a Union and single-branch Alts and Unions collapse
+       to their branch.
+
+       Results are memoized in `memo` by structure, and on each node.
+    """
+    if not isinstance(tree, CompoundNameTree):
+      return tree
+    if tree._simplified is not None:
+      return tree._simplified
+    if memo is None:
+      memo = {}
+    simplified = memo.get(tree)
+    if simplified is not None:
+      return simplified
+
+    if isinstance(tree, cls.Alt):
+      trees = []
+      for t in tree:
+        t = cls.simplify_tree(t, memo)
+        if t is cls.Neg:
+          continue
+        # simplified Alts hold no Neg, and a Fail only as their last branch
+        trees.extend(t.trees if isinstance(t, cls.Alt) else (t,))
+        if trees[-1] is cls.Fail:
+          break
+      simplified = cls._collapse(cls.Alt, trees)
+    elif isinstance(tree, cls.Union):
+      if len(tree.trees) == 1:
+        simplified = cls.simplify_tree(tree.trees[0].tree, memo)
+      else:
+        weighted = []
+        for w in tree:
+          if w.weight > 0:
+            t = cls.simplify_tree(w.tree, memo)
+            if t is not cls.Neg:
+              weighted.append(w if t is w.tree else cls.Weighted(w.weight, t))
+        if len(weighted) == 1:
+          simplified = weighted[0].tree
+        else:
+          simplified = cls._collapse(cls.Union, weighted)
+    elif isinstance(tree, cls.Weighted):
+      t = cls.simplify_tree(tree.tree, memo)
+      simplified = tree if t is tree.tree else cls.Weighted(tree.weight, t)
+    else:
+      simplified = tree
+
+    memo[tree] = tree._simplified = simplified
+    return simplified
+
+  def _collapse(cls, node, trees):
+    if not trees:
+      return cls.Neg
+    if len(trees) == 1:
+      return trees[0]
+    return node(*trees)
+
+  def __call__(cls, *args):
+    tree = type.__call__(cls, *args)
+    table = NameTree.hash_consing
+    if table is not None:
+      return table.intern(tree)
+    return tree
+
+
+class HashConsTable(object):
+  """Canonical instances of compound NameTree nodes.
+
+     While a table is installed as `NameTree.hash_consing`, every Leaf,
+     Alt, Union and Weighted constructed (by the parser, by NameTree.map
+     or directly) is replaced with the structurally equal node already
+     in the table, so identical subtrees are a single object and later
+     equality checks short-circuit on identity.  This extends what the
+     Neg, Fail and Empty singletons do to compound nodes.  Nodes are
+     held weakly and drop out of the table once nothing else refers to
+     them.
+  """
+
+  def __init__(self):
+    self._nodes = WeakValueDictionary()
+
+  def intern(self, tree):
+    if not isinstance(tree, CompoundNameTree):
       return tree
+    key = (tree.__class__, tree.key)
+    canonical = self._nodes.get(key)
+    if canonical is None:
+      self._nodes[key] = canonical = tree
+    return canonical
+
+  def __len__(self):
+    return len(self._nodes)
 
 
 class NameTree(NameTreeBase('NameTreeBase', (object,), {})):
+  # an optional HashConsTable shared by every constructed node
+  hash_consing = None
 
   @property
   def show(self):
@@ -36,26 +138,55 @@ class NameTree(NameTreeBase('NameTreeBase', (object,), {})):
   def map(self, func):
     return self.__class__.map_tree(self, func)
 
+  @property
+  def simplified(self):
+    return self.__class__.simplify_tree(self)
+
   def __str__(self):
     return "NameTree.{}({})".format(self.__class__.__name__, self.show)
 
   def __eq__(self, other):
-    if isinstance(other, self.__class__):
-      return self.__str__() == other.__str__()
-    raise NotImplementedError()
+    return self is other
 
   def __ne__(self, other):
     return not self.__eq__(other)
 
+  def __hash__(self):
+    return id(self)
+
+
+class CompoundNameTree(NameTree):
+  """A NameTree node whose equality and hash are structural.
+
+     Nodes are immutable, so the hash is computed once from `key` and
+     cached; equality compares cached hashes before comparing keys.
+  """
+  _hash = None
+  _simplified = None
+
+  @property
+  def key(self):
+    raise NotImplementedError()
+
+  def __eq__(self, other):
+    if self is other:
+      return True
+    return (isinstance(other, self.__class__) and hash(self) == hash(other) and
+            self.key == other.key)
 
-class Alt(NameTree):
+  def __hash__(self):
+    if self._hash is None:
+      self._hash = hash((self.__class__.__name__, self.key))
+    return self._hash
+
+
+class Alt(CompoundNameTree):
 
   def __init__(self, *trees):
-    self._trees = []
     for tree in trees:
       if not isinstance(tree, NameTree):
         raise TypeError("{} is not a NameTree".format(tree))
-      self._trees.append(tree)
+    self._trees = trees
 
   def __iter__(self):
     return iter(self._trees)
@@ -64,6 +195,10 @@ class Alt(NameTree):
   def trees(self):
     return self._trees
 
+  @property
+  def key(self):
+    return self._trees
+
   @property
   def show(self):
     return ','.join([t.__str__() for t in self.trees])
@@ -81,9 +216,6 @@ class Empty(NameTree):
   def __str__(self):
     return "NameTree.{}".format(self.show)
 
-  def __eq__(self, other):
-    return self is other
-
 Empty = Empty()  # singleton
 
 
@@ -96,13 +228,10 @@ class Fail(NameTree):
   def __str__(self):
     return "NameTree.{}".format(self.show)
 
-  def __eq__(self, other):
-    return self is other
-
 Fail = Fail()  # singleton
 
 
-class Leaf(NameTree):
+class Leaf(CompoundNameTree):
 
   def __init__(self, value):
     if not hasattr(self.__class__, '__path'):
@@ -118,17 +247,29 @@ class Leaf(NameTree):
   def value(self):
     return self._value
 
+  @property
+  def key(self):
+    return self._value
+
   @property
   def show(self):
     if isinstance(self._value, self.__class__.__path):
       return self.value.__str__()
-    return self.value
+    return str(self.value)
 
   def __eq__(self, other):
+    if self is other:
+      return True
     if isinstance(other, Leaf):
-      return self.value == other.value
+      return hash(self) == hash(other) and self.value == other.value
     return self.value == other
 
+  def __hash__(self):
+    # a Leaf equals its bare value, so it must hash like it
+    if self._hash is None:
+      self._hash = hash(self._value)
+    return self._hash
+
   def __add__(self, other):
     if isinstance(other, self.__class__):
       return self.__class__(self.value + other.value)
@@ -144,24 +285,20 @@ class Neg(NameTree):
   def __str__(self):
     return "NameTree.{}".format(self.show)
 
-  def __eq__(self, other):
-    return self is other
-
 Neg = Neg()  # singleton
 
 
-class Union(NameTree):
+class Union(CompoundNameTree):
 
   @classmethod
   def from_seq(cls, trees):
-    return cls(trees)
+    return cls(*trees)
 
   def __init__(self, *trees):
-    self._trees = []
     for tree in trees:
       if not isinstance(tree, Weighted):
         raise TypeError("{} is not a Weighted Nametree".format(tree))
-      self._trees.append(tree)
+    self._trees = trees
 
   def __iter__(self):
     return iter(self._trees)
@@ -170,12 +307,16 @@ class Union(NameTree):
   def trees(self):
     return self._trees
 
+  @property
+  def key(self):
+    return self._trees
+
   @property
   def show(self):
     return ",".join([t.__str__() for t in self.trees])
 
 
-class Weighted(NameTree):
+class Weighted(CompoundNameTree):
   defaultWeight = 1
 
   def __init__(self, weight, tree):
@@ -192,6 +333,10 @@ class Weighted(NameTree):
   def weight(self):
     return self._weight
 
+  @property
+  def key(self):
+    return (self._weight, self._tree)
+
   @property
   def show(self):
     return "{},{}".format(self.weight, self.tree)